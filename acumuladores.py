@@ -0,0 +1,244 @@
+import math
+import threading
+
+
+class EstadisticaContinua:
+    """Conteo, media, varianza (Welford), mínimo y máximo en memoria constante."""
+
+    def __init__(self):
+        self.n = 0
+        self.media = 0.0
+        self.m2 = 0.0
+        self.minimo = None
+        self.maximo = None
+
+    def agregar(self, x):
+        self.n += 1
+        delta = x - self.media
+        self.media += delta / self.n
+        self.m2 += delta * (x - self.media)
+        if self.minimo is None or x < self.minimo:
+            self.minimo = x
+        if self.maximo is None or x > self.maximo:
+            self.maximo = x
+
+    def combinar(self, otro):
+        """Combina con otra estadística (fórmula de Chan para la varianza)."""
+        if not otro.n:
+            return
+        if not self.n:
+            self.n, self.media, self.m2 = otro.n, otro.media, otro.m2
+            self.minimo, self.maximo = otro.minimo, otro.maximo
+            return
+        n = self.n + otro.n
+        delta = otro.media - self.media
+        self.media += delta * otro.n / n
+        self.m2 += otro.m2 + delta * delta * self.n * otro.n / n
+        self.n = n
+        self.minimo = min(self.minimo, otro.minimo)
+        self.maximo = max(self.maximo, otro.maximo)
+
+    @property
+    def suma(self):
+        return self.media * self.n
+
+    @property
+    def varianza(self):
+        return self.m2 / self.n if self.n else 0.0
+
+    @property
+    def desviacion(self):
+        return math.sqrt(self.varianza)
+
+
+class Histograma:
+    """Histograma de cubetas fijas de ancho `ancho`; la última acumula el desborde."""
+
+    def __init__(self, ancho, num_cubetas):
+        self.ancho = ancho
+        self.cubetas = [0] * num_cubetas
+
+    def agregar(self, x):
+        self.cubetas[min(int(x) // self.ancho, len(self.cubetas) - 1)] += 1
+
+    def combinar(self, otro):
+        for i, c in enumerate(otro.cubetas):
+            self.cubetas[i] += c
+
+    def como_dict(self):
+        """Cubetas no vacías como {"desde-hasta": cuenta}."""
+        ultima = len(self.cubetas) - 1
+        resultado = {}
+        for i, c in enumerate(self.cubetas):
+            if not c:
+                continue
+            desde = i * self.ancho
+            if i == ultima:
+                etiqueta = f"{desde}+"
+            elif self.ancho == 1:
+                etiqueta = str(desde)
+            else:
+                etiqueta = f"{desde}-{desde + self.ancho - 1}"
+            resultado[etiqueta] = c
+        return resultado
+
+
+class HistogramaTiempos:
+    """Histograma logarítmico de duraciones para estimar cuantiles.
+
+    Cada cubeta cubre un factor 2**(1/8) (error relativo < 5 %), desde 100 ns
+    hasta varios minutos, así que la memoria es fija y los shards se combinan
+    sumando cubetas.
+    """
+
+    MINIMO = 1e-7
+    POR_OCTAVA = 8
+    NUM_CUBETAS = 8 * 32
+
+    def __init__(self):
+        self.cubetas = [0] * self.NUM_CUBETAS
+        self.n = 0
+        self.suma = 0.0
+
+    def agregar(self, segundos):
+        self.n += 1
+        self.suma += segundos
+        if segundos <= self.MINIMO:
+            i = 0
+        else:
+            i = min(int(math.log2(segundos / self.MINIMO) * self.POR_OCTAVA), self.NUM_CUBETAS - 1)
+        self.cubetas[i] += 1
+
+    def combinar(self, otro):
+        self.n += otro.n
+        self.suma += otro.suma
+        for i, c in enumerate(otro.cubetas):
+            self.cubetas[i] += c
+
+    def cuantil(self, q):
+        """Cuantil q (0..1) aproximado por el centro geométrico de su cubeta."""
+        if not self.n:
+            return 0.0
+        objetivo = q * self.n
+        acumulado = 0
+        for i, c in enumerate(self.cubetas):
+            acumulado += c
+            if acumulado >= objetivo and c:
+                return self.MINIMO * 2 ** ((i + 0.5) / self.POR_OCTAVA)
+        return self.MINIMO * 2 ** (self.NUM_CUBETAS / self.POR_OCTAVA)
+
+    @property
+    def media(self):
+        return self.suma / self.n if self.n else 0.0
+
+
+class AcumuladorReporte:
+    """Estadísticas del reporte acumuladas caso a caso, en memoria constante.
+
+    Cada caso actualiza contadores, media/varianza, extremos, histogramas y
+    cuantiles de tiempo, así que el reporte cuesta lo mismo con 100 o 100M
+    casos. `instantanea()` puede llamarse desde otro hilo mientras se genera.
+    """
+
+    OPERADORES = ["+", "-", "*", "/"]
+    CUANTILES = {"p50": 0.5, "p90": 0.9, "p99": 0.99}
+    # Fases medidas por separado en cada caso (exportar, sólo al exportar)
+    FASES = ["derivar", "mutar", "analizar", "clasificar", "exportar"]
+
+    def __init__(self):
+        self.total = 0
+        self.por_tipo = {"valida": 0, "invalida": 0, "extrema": 0}
+        self.tiempos = {tipo: HistogramaTiempos() for tipo in self.por_tipo}
+        self.longitud = EstadisticaContinua()
+        self.profundidad = EstadisticaContinua()
+        self.hist_longitud = Histograma(5, 40)
+        self.hist_profundidad = Histograma(1, 32)
+        self.operadores = {op: 0 for op in self.OPERADORES}
+        self.mutaciones = {}
+        self.fases = {fase: HistogramaTiempos() for fase in self.FASES}
+        self._cerrojo = threading.Lock()
+
+    def __getstate__(self):
+        estado = self.__dict__.copy()
+        del estado["_cerrojo"]
+        return estado
+
+    def __setstate__(self, estado):
+        self.__dict__.update(estado)
+        self._cerrojo = threading.Lock()
+
+    def agregar(self, tipo, meta, analisis, tiempo, fases=()):
+        """Incorpora un caso (su análisis fusionado) y su tiempo de generación.
+
+        `fases` son pares (fase, duracion_ns) medidos para el caso.
+        """
+        longitud, profundidad, operadores = analisis[:3]
+        with self._cerrojo:
+            for fase, duracion in fases:
+                self.fases[fase].agregar(duracion / 1e9)
+            self.total += 1
+            self.por_tipo[tipo] += 1
+            self.tiempos[tipo].agregar(tiempo)
+
+            self.longitud.agregar(longitud)
+            self.profundidad.agregar(profundidad)
+            self.hist_longitud.agregar(longitud)
+            self.hist_profundidad.agregar(profundidad)
+            for op, count in zip(self.OPERADORES, operadores):
+                self.operadores[op] += count
+
+            if tipo == "invalida" and meta != "N/A":
+                self.mutaciones[meta] = self.mutaciones.get(meta, 0) + 1
+
+    def agregar_fase(self, fase, duracion_ns):
+        """Registra la duración de una fase suelta (p. ej. la exportación de un caso)."""
+        with self._cerrojo:
+            self.fases[fase].agregar(duracion_ns / 1e9)
+
+    def combinar(self, otro):
+        """Suma a este acumulador las estadísticas de otro (p. ej. de un shard)."""
+        with self._cerrojo:
+            self.total += otro.total
+            for tipo in self.por_tipo:
+                self.por_tipo[tipo] += otro.por_tipo[tipo]
+                self.tiempos[tipo].combinar(otro.tiempos[tipo])
+            self.longitud.combinar(otro.longitud)
+            self.profundidad.combinar(otro.profundidad)
+            self.hist_longitud.combinar(otro.hist_longitud)
+            self.hist_profundidad.combinar(otro.hist_profundidad)
+            for op, count in otro.operadores.items():
+                self.operadores[op] += count
+            for tipo_mut, count in otro.mutaciones.items():
+                self.mutaciones[tipo_mut] = self.mutaciones.get(tipo_mut, 0) + count
+            for fase, histograma in otro.fases.items():
+                self.fases[fase].combinar(histograma)
+
+    def instantanea(self):
+        """Copia consistente de las estadísticas actuales, en forma de dict."""
+        with self._cerrojo:
+            return {
+                "total": self.total,
+                "por_tipo": dict(self.por_tipo),
+                "longitud_promedio": self.longitud.media,
+                "longitud_desviacion": self.longitud.desviacion,
+                "longitud_minima": self.longitud.minimo or 0,
+                "longitud_maxima": self.longitud.maximo or 0,
+                "profundidad_promedio": self.profundidad.media,
+                "profundidad_desviacion": self.profundidad.desviacion,
+                "profundidad_minima": self.profundidad.minimo or 0,
+                "profundidad_maxima": self.profundidad.maximo or 0,
+                "histograma_longitud": self.hist_longitud.como_dict(),
+                "histograma_profundidad": self.hist_profundidad.como_dict(),
+                "operadores": dict(self.operadores),
+                "mutaciones": dict(self.mutaciones),
+                "tiempo_promedio_por_tipo": {t: h.media for t, h in self.tiempos.items()},
+                "tiempo_cuantiles_por_tipo": {
+                    t: {nombre: h.cuantil(q) for nombre, q in self.CUANTILES.items()}
+                    for t, h in self.tiempos.items()
+                },
+                "fases": {
+                    fase: dict({"n": h.n, "total": h.suma, "media": h.media},
+                               **{nombre: h.cuantil(q) for nombre, q in self.CUANTILES.items()})
+                    for fase, h in self.fases.items() if h.n
+                }
+            }
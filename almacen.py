@@ -0,0 +1,222 @@
+import json
+import mmap
+import sys
+from array import array
+from collections.abc import Sequence
+
+from acumuladores import AcumuladorReporte
+
+
+def metricas(analisis):
+    """Dict de métricas de un caso a partir de su análisis fusionado."""
+    longitud, profundidad, operadores = analisis[:3]
+    return {
+        "longitud_tokens": longitud,
+        "profundidad_estimada": profundidad,
+        "conteo_operadores": dict(zip(AcumuladorReporte.OPERADORES, operadores)),
+        "nivel_anidamiento": profundidad
+    }
+
+
+def clasificacion(analisis, tipo_generado, veredicto):
+    """Dict de clasificación de un caso a partir de su análisis y el veredicto del reconocedor."""
+    longitud, profundidad, _, parentesis_balance, tiene_tokens_invalidos = analisis
+    aceptada, posicion_error = veredicto
+    return {
+        "tipo_declarado": tipo_generado,
+        "parentesis_balanceados": parentesis_balance,
+        "contiene_tokens_invalidos": tiene_tokens_invalidos,
+        "es_extremo": longitud > 30 or profundidad > 10,
+        "aceptada_gramatica": aceptada,
+        "posicion_error": posicion_error
+    }
+
+
+def materializar_caso(id_caso, tipo, tokens, detalle, analisis, veredicto):
+    """Arma el dict de un caso tal como se exporta."""
+    return {
+        "id": id_caso,
+        "tipo": tipo,
+        "cadena": " ".join(tokens),
+        "detalle_generacion": detalle,
+        "metricas": metricas(analisis),
+        "clasificacion": clasificacion(analisis, tipo, veredicto)
+    }
+
+
+class AlmacenCasos(Sequence):
+    """Resultados en columnas (struct-of-arrays) en lugar de un dict por caso.
+
+    Los tokens se internan en `vocabulario` y se guardan como un único arreglo
+    de códigos con desplazamientos por caso; tipo y detalle son códigos
+    pequeños y cada métrica es una columna numérica. Un caso ocupa unas decenas
+    de bytes y su dict se arma sólo al indexarlo o recorrerlo.
+
+    `guardar` escribe un archivo binario que `cargar` mapea en memoria sin
+    copiar ni parsear JSON; un almacén cargado se vuelve a copiar a memoria
+    sólo si se le agregan casos.
+    """
+
+    TIPOS = ("valida", "invalida", "extrema")
+    MAGIA = b"CASOSBIN"
+    VERSION = 1
+    # Columna -> código de tipo de array; "operadores" guarda 4 valores por caso
+    COLUMNAS = {
+        "ids": "q",
+        "desplazamientos": "q",
+        "tokens": "i",
+        "tipos": "b",
+        "detalles": "h",
+        "profundidad": "i",
+        "operadores": "i",
+        "balanceados": "b",
+        "basura": "b",
+        "aceptada": "b",
+        "posicion_error": "i"
+    }
+
+    def __init__(self):
+        self.vocabulario = []
+        self._codigos_token = {}
+        self.detalles = []
+        self._codigos_detalle = {}
+        self.columnas = {nombre: array(codigo) for nombre, codigo in self.COLUMNAS.items()}
+        self.columnas["desplazamientos"].append(0)
+        self._mapa = None
+
+    def _codigo(self, valor, valores, codigos):
+        codigo = codigos.get(valor)
+        if codigo is None:
+            codigo = codigos[valor] = len(valores)
+            valores.append(valor)
+        return codigo
+
+    def agregar(self, id_caso, tipo, tokens, detalle, analisis, veredicto):
+        """Agrega un caso a partir de sus tokens, análisis fusionado y veredicto."""
+        if self._mapa is not None:
+            self._copiar_a_memoria()
+        c = self.columnas
+        vocabulario, codigos = self.vocabulario, self._codigos_token
+        c["tokens"].extend([self._codigo(t, vocabulario, codigos) for t in tokens])
+        c["desplazamientos"].append(len(c["tokens"]))
+        c["ids"].append(id_caso)
+        c["tipos"].append(self.TIPOS.index(tipo))
+        c["detalles"].append(self._codigo(detalle, self.detalles, self._codigos_detalle))
+
+        _, profundidad, operadores, balanceados, basura = analisis
+        aceptada, posicion_error = veredicto
+        c["profundidad"].append(profundidad)
+        c["operadores"].extend(operadores)
+        c["balanceados"].append(balanceados)
+        c["basura"].append(basura)
+        c["aceptada"].append(aceptada)
+        c["posicion_error"].append(-1 if posicion_error is None else posicion_error)
+
+    def extender(self, otro):
+        """Agrega al final todos los casos de otro almacén (p. ej. de un shard)."""
+        if self._mapa is not None:
+            self._copiar_a_memoria()
+        c, o = self.columnas, otro.columnas
+        tokens = self.vocabulario, self._codigos_token
+        detalles = self.detalles, self._codigos_detalle
+        mapa_tokens = [self._codigo(t, *tokens) for t in otro.vocabulario]
+        mapa_detalles = [self._codigo(d, *detalles) for d in otro.detalles]
+
+        base = len(c["tokens"])
+        c["tokens"].extend([mapa_tokens[t] for t in o["tokens"]])
+        c["desplazamientos"].extend([base + d for d in o["desplazamientos"][1:]])
+        c["detalles"].extend([mapa_detalles[d] for d in o["detalles"]])
+        for nombre in ("ids", "tipos", "profundidad", "operadores", "balanceados", "basura",
+                       "aceptada", "posicion_error"):
+            c[nombre].extend(o[nombre])
+
+    def __len__(self):
+        return len(self.columnas["ids"])
+
+    def tokens(self, i):
+        """Lista de tokens del caso en la posición i."""
+        desplazamientos, vocabulario = self.columnas["desplazamientos"], self.vocabulario
+        return [vocabulario[t] for t in self.columnas["tokens"][desplazamientos[i]:desplazamientos[i + 1]]]
+
+    def registro(self, i):
+        """Caso en la posición i como (id, tipo, tokens, detalle, analisis, veredicto)."""
+        c = self.columnas
+        tokens = self.tokens(i)
+        posicion_error = c["posicion_error"][i]
+        analisis = (len(tokens), c["profundidad"][i], list(c["operadores"][4 * i:4 * i + 4]),
+                    bool(c["balanceados"][i]), bool(c["basura"][i]))
+        veredicto = (bool(c["aceptada"][i]), None if posicion_error < 0 else posicion_error)
+        return (c["ids"][i], self.TIPOS[c["tipos"][i]], tokens, self.detalles[c["detalles"][i]],
+                analisis, veredicto)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("índice de caso fuera de rango")
+        return materializar_caso(*self.registro(i))
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield materializar_caso(*self.registro(i))
+
+    def memoria_bytes(self):
+        """Memoria aproximada de columnas y tablas de internado."""
+        columnas = sum(len(col) * col.itemsize for col in self.columnas.values())
+        return columnas + sum(sys.getsizeof(v) for v in self.vocabulario + self.detalles)
+
+    def guardar(self, nombre_archivo):
+        """Escribe el almacén en formato binario: cabecera JSON y columnas alineadas a 8 bytes."""
+        cabecera = json.dumps({
+            "version": self.VERSION,
+            "orden_bytes": sys.byteorder,
+            "vocabulario": self.vocabulario,
+            "detalles": self.detalles,
+            "columnas": [[nombre, col.format if isinstance(col, memoryview) else col.typecode, len(col)]
+                         for nombre, col in self.columnas.items()]
+        }, ensure_ascii=False).encode('utf-8')
+        with open(nombre_archivo, 'wb') as f:
+            f.write(self.MAGIA + len(cabecera).to_bytes(8, "little") + cabecera)
+            f.write(b"\0" * (-f.tell() % 8))
+            for col in self.columnas.values():
+                f.write(col)
+                f.write(b"\0" * (-f.tell() % 8))
+
+    @classmethod
+    def cargar(cls, nombre_archivo):
+        """Abre un almacén guardado, mapeando sus columnas en memoria."""
+        with open(nombre_archivo, 'rb') as f:
+            mapa = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if mapa[:len(cls.MAGIA)] != cls.MAGIA:
+            raise ValueError(f"{nombre_archivo} no es un almacén de casos")
+        inicio = len(cls.MAGIA) + 8
+        largo = int.from_bytes(mapa[len(cls.MAGIA):inicio], "little")
+        cabecera = json.loads(mapa[inicio:inicio + largo].decode('utf-8'))
+        if cabecera["version"] != cls.VERSION or cabecera["orden_bytes"] != sys.byteorder:
+            raise ValueError(f"Versión u orden de bytes incompatible en {nombre_archivo}")
+
+        almacen = cls()
+        almacen.vocabulario = cabecera["vocabulario"]
+        almacen._codigos_token = {t: i for i, t in enumerate(almacen.vocabulario)}
+        almacen.detalles = cabecera["detalles"]
+        almacen._codigos_detalle = {d: i for i, d in enumerate(almacen.detalles)}
+
+        vista = memoryview(mapa)
+        posicion = inicio + largo
+        for nombre, codigo, n in cabecera["columnas"]:
+            posicion += -posicion % 8
+            tam = n * array(codigo).itemsize
+            almacen.columnas[nombre] = vista[posicion:posicion + tam].cast(codigo)
+            posicion += tam
+        almacen._mapa = mapa
+        return almacen
+
+    def _copiar_a_memoria(self):
+        """Reemplaza las columnas mapeadas por arreglos propios, para poder agregar."""
+        for nombre, codigo in self.COLUMNAS.items():
+            col = array(codigo)
+            col.frombytes(self.columnas[nombre].cast("B"))
+            self.columnas[nombre] = col
+        self._mapa = None
@@ -0,0 +1,177 @@
+import math
+import threading
+from hashlib import blake2b
+
+
+class Cobertura:
+    """Cobertura de producciones y de k-caminos durante la derivación.
+
+    Un k-camino es una cadena de k producciones p1 -> ... -> pk donde cada una
+    expande un no terminal del lado derecho de la anterior; con k = 1 es la
+    cobertura de producciones. `elegir` reemplaza la elección uniforme de la
+    derivación: con probabilidad `guia` prefiere una producción aún no usada y,
+    si no hay, una que cierre un k-camino nuevo desde el contexto actual (las
+    k-1 producciones anteriores en la rama). Varios hilos pueden compartir una
+    instancia: cada operación se hace bajo un cerrojo.
+    """
+
+    def __init__(self, generador, k=2):
+        self.k = k
+        num_nt = generador.num_no_terminales
+        self.lhs = generador.prod_lhs
+        self.expansiones = []
+        self.opciones = [[] for _ in range(num_nt)]
+        self.opciones_corte = [[] for _ in range(num_nt)]
+        for p, lhs in enumerate(self.lhs):
+            expansion = tuple(reversed(generador.prod_simbolos[generador.prod_inicio[p]:generador.prod_inicio[p + 1]]))
+            self.expansiones.append(expansion)
+            self.opciones[lhs].append(p)
+            if expansion in generador._expansiones_corte[lhs]:
+                self.opciones_corte[lhs].append(p)
+
+        # Producciones alcanzables desde el símbolo inicial y sus sucesoras
+        sucesoras = [
+            [q for nt in sorted({s for s in e if s < num_nt}) for q in self.opciones[nt]]
+            for e in self.expansiones
+        ]
+        alcanzables, pendientes = set(), list(self.opciones[generador.simbolo_inicial])
+        while pendientes:
+            p = pendientes.pop()
+            if p not in alcanzables:
+                alcanzables.add(p)
+                pendientes.extend(sucesoras[p])
+        self.total_producciones = len(alcanzables)
+        # Cadenas de k producciones que empiezan en cada una, por programación dinámica
+        cadenas = [1] * len(self.lhs)
+        for _ in range(k - 1):
+            cadenas = [sum(cadenas[q] for q in sucesoras[p]) for p in range(len(self.lhs))]
+        self.total_caminos = sum(cadenas[p] for p in alcanzables)
+        self._cerrojo = threading.Lock()
+        self.reiniciar()
+
+    def __getstate__(self):
+        estado = self.__dict__.copy()
+        del estado["_cerrojo"]
+        return estado
+
+    def __setstate__(self, estado):
+        self.__dict__.update(estado)
+        self._cerrojo = threading.Lock()
+
+    def reiniciar(self):
+        """Olvida la cobertura registrada."""
+        with self._cerrojo:
+            self._reiniciar()
+
+    def _reiniciar(self):
+        self.usadas = bytearray(len(self.lhs))
+        self.cubiertas = 0
+        self.pendientes_nt = [len(o) for o in self.opciones]
+        self.caminos = set()
+        # (contexto, no_terminal, corte) sin k-caminos nuevos: se eligen sin buscar
+        self._agotados = set()
+
+    def registrar(self, contexto, p):
+        with self._cerrojo:
+            self._registrar(contexto, p)
+
+    def _registrar(self, contexto, p):
+        if not self.usadas[p]:
+            self.usadas[p] = 1
+            self.cubiertas += 1
+            self.pendientes_nt[self.lhs[p]] -= 1
+        if len(contexto) == self.k - 1 > 0:
+            self.caminos.add(contexto + (p,))
+
+    def elegir(self, simbolo, contexto, corte, rng, guia):
+        """Elige y registra una producción de `simbolo`; retorna su índice."""
+        opciones = (self.opciones_corte if corte else self.opciones)[simbolo]
+        with self._cerrojo:
+            nuevas = None
+            if guia and rng.random() < guia:
+                if self.pendientes_nt[simbolo]:
+                    nuevas = [p for p in opciones if not self.usadas[p]]
+                clave = (contexto, simbolo, corte)
+                if not nuevas and len(contexto) == self.k - 1 > 0 and clave not in self._agotados:
+                    nuevas = [p for p in opciones if contexto + (p,) not in self.caminos]
+                    if not nuevas:
+                        self._agotados.add(clave)
+            p = rng.choice(nuevas or opciones)
+            self._registrar(contexto, p)
+            return p
+
+    def combinar(self, otra):
+        """Agrega la cobertura de otra instancia sobre la misma gramática (p. ej. de un shard)."""
+        with self._cerrojo:
+            for p, usada in enumerate(otra.usadas):
+                if usada and not self.usadas[p]:
+                    self.usadas[p] = 1
+                    self.cubiertas += 1
+                    self.pendientes_nt[self.lhs[p]] -= 1
+            self.caminos |= otra.caminos
+            self._agotados.clear()
+
+    def estadisticas(self):
+        with self._cerrojo:
+            estadisticas = {
+                "k": self.k,
+                "producciones_cubiertas": self.cubiertas,
+                "producciones_total": self.total_producciones,
+                "porcentaje_producciones": 100 * self.cubiertas / self.total_producciones if self.total_producciones else 0.0
+            }
+            if self.k > 1:
+                estadisticas.update({
+                    "caminos_cubiertos": len(self.caminos),
+                    "caminos_total": self.total_caminos,
+                    "porcentaje_caminos": 100 * len(self.caminos) / self.total_caminos if self.total_caminos else 0.0
+                })
+            return estadisticas
+
+
+class FiltroBloom:
+    """Filtro de Bloom para descartar cadenas repetidas con memoria fija.
+
+    Se dimensiona para `capacidad` elementos con tasa de falsos positivos
+    `tasa_falsos` (unos 1,2 bytes por elemento al 1 %, p. ej. ~120 MB para 100
+    millones). Más allá de la capacidad la memoria no crece; sólo aumenta la
+    tasa de falsos positivos, es decir, cadenas nuevas tomadas por repetidas.
+    Las posiciones salen de un hash blake2b, así que el resultado es el mismo
+    en cada ejecución con la misma semilla.
+    """
+
+    def __init__(self, capacidad, tasa_falsos=0.01):
+        num_bits = max(64, math.ceil(-capacidad * math.log(tasa_falsos) / math.log(2) ** 2))
+        self.bits = bytearray((num_bits + 7) // 8)
+        self.num_bits = len(self.bits) * 8
+        self.num_hashes = max(1, round(num_bits / max(capacidad, 1) * math.log(2)))
+        self.elementos = 0
+        self.duplicados = 0
+
+    def agregar(self, tokens):
+        """Agrega una cadena (lista de tokens); retorna False si ya estaba (o es falso positivo)."""
+        digest = blake2b("\x1f".join(tokens).encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        bits, num_bits = self.bits, self.num_bits
+        nuevo = False
+        for i in range(self.num_hashes):
+            posicion = (h1 + i * h2) % num_bits
+            mascara = 1 << (posicion & 7)
+            if not bits[posicion >> 3] & mascara:
+                bits[posicion >> 3] |= mascara
+                nuevo = True
+        if nuevo:
+            self.elementos += 1
+        else:
+            self.duplicados += 1
+        return nuevo
+
+    def estadisticas(self):
+        llenado = 1 - math.exp(-self.num_hashes * self.elementos / self.num_bits)
+        return {
+            "elementos": self.elementos,
+            "duplicados": self.duplicados,
+            "memoria_bytes": len(self.bits),
+            "funciones_hash": self.num_hashes,
+            "tasa_falsos_positivos_estimada": llenado ** self.num_hashes
+        }
@@ -0,0 +1,211 @@
+from bisect import bisect_right
+
+
+class TablaConteo:
+    """Conteo de derivaciones por longitud para muestreo uniforme sin truncamiento.
+
+    Para cada no terminal A y cada longitud n <= long_max precalcula cuántas
+    derivaciones de A producen exactamente n tokens. Con esas tablas se eligen
+    producción y reparto de longitudes con los pesos exactos, de modo que toda
+    derivación de longitud n tiene la misma probabilidad y nunca hay rechazo.
+
+    Las mismas tablas numeran las derivaciones de cada longitud (rank/unrank):
+    `desclasificar` arma la derivación de un índice y `clasificar` calcula el
+    índice de un árbol. En una gramática no ambigua (p. ej. SLR) cada índice es
+    una cadena distinta.
+    """
+
+    def __init__(self, generador, long_max):
+        self.long_max = long_max
+        self.num_no_terminales = generador.num_no_terminales
+        self.producciones = [
+            tuple(generador.prod_simbolos[generador.prod_inicio[p]:generador.prod_inicio[p + 1]])
+            for p in range(len(generador.prod_lhs))
+        ]
+        self.producciones_de = [[] for _ in range(self.num_no_terminales)]
+        for p, lhs in enumerate(generador.prod_lhs):
+            self.producciones_de[lhs].append(p)
+        self._produccion = {(lhs, rhs): p for p, (lhs, rhs) in enumerate(zip(generador.prod_lhs, self.producciones))}
+        # Elecciones con sus pesos acumulados, calculadas bajo demanda
+        self._elecciones = {}
+        self._repartos = {}
+
+        # conteos[A][n]: derivaciones de A con n tokens
+        # sufijos[p][i][n]: formas en que los símbolos i.. de la producción p producen n tokens
+        self.conteos = [[0] * (long_max + 1) for _ in range(self.num_no_terminales)]
+        self.sufijos = [
+            [[0] * (long_max + 1) for _ in range(len(rhs) + 1)] for rhs in self.producciones
+        ]
+        for sufijo in self.sufijos:
+            sufijo[-1][0] = 1
+
+        for n in range(long_max + 1):
+            self._calcular_longitud(n)
+
+    def _contar(self, simbolo, n):
+        """Derivaciones de `simbolo` con n tokens (un terminal produce exactamente uno)."""
+        if simbolo < self.num_no_terminales:
+            return self.conteos[simbolo][n]
+        return 1 if n == 1 else 0
+
+    def _calcular_longitud(self, n):
+        """Completa las tablas para la longitud n.
+
+        Las producciones unitarias o vacías hacen que los conteos de longitud n
+        dependan entre sí, así que se itera hasta un punto fijo. Si no converge
+        hay un ciclo con infinitas derivaciones de la misma longitud.
+        """
+        for _ in range(self.num_no_terminales + 2):
+            cambio = False
+            for p, rhs in enumerate(self.producciones):
+                sufijo = self.sufijos[p]
+                for i in range(len(rhs) - 1, -1, -1):
+                    siguiente = sufijo[i + 1]
+                    sufijo[i][n] = sum(self._contar(rhs[i], m) * siguiente[n - m] for m in range(n + 1))
+            for nt in range(self.num_no_terminales):
+                total = sum(self.sufijos[p][0][n] for p in self.producciones_de[nt])
+                if total != self.conteos[nt][n]:
+                    self.conteos[nt][n] = total
+                    cambio = True
+            if not cambio:
+                return
+        raise ValueError(f"La gramática tiene infinitas derivaciones de longitud {n} (ciclo unitario o vacío)")
+
+    def longitudes(self, simbolo):
+        """Longitudes <= long_max en las que `simbolo` tiene al menos una derivación."""
+        return [n for n in range(self.long_max + 1) if self._contar(simbolo, n)]
+
+    def elegir_longitud(self, simbolo, rng, distribucion=None):
+        """Elige una longitud alcanzable.
+
+        distribucion=None reparte uniformemente entre longitudes; "cadenas" pondera
+        por número de derivaciones (uniforme sobre todas las cadenas <= long_max);
+        un dict {longitud: peso} fija la distribución explícitamente.
+        """
+        posibles = [n for n in self.longitudes(simbolo) if n > 0]
+        if not posibles:
+            raise ValueError("El símbolo no tiene derivaciones dentro de long_max")
+        if distribucion is None:
+            return rng.choice(posibles)
+        if distribucion == "cadenas":
+            pesos = [self._contar(simbolo, n) for n in posibles]
+        else:
+            posibles = [n for n in posibles if distribucion.get(n)]
+            pesos = [distribucion[n] for n in posibles]
+        return rng.choices(posibles, weights=pesos)[0]
+
+    def _eleccion(self, simbolo, n):
+        """Producciones de `simbolo` con derivaciones de longitud n y sus conteos acumulados."""
+        datos = self._elecciones.get((simbolo, n))
+        if datos is None:
+            producciones, acumulados, total = [], [], 0
+            for p in self.producciones_de[simbolo]:
+                if self.sufijos[p][0][n]:
+                    total += self.sufijos[p][0][n]
+                    producciones.append(p)
+                    acumulados.append(total)
+            datos = self._elecciones[(simbolo, n)] = (producciones, acumulados)
+        return datos
+
+    def _reparto(self, p, i, n):
+        """Longitudes posibles del símbolo i de p cuando rhs[i:] produce n tokens, con pesos acumulados."""
+        datos = self._repartos.get((p, i, n))
+        if datos is None:
+            x, siguiente = self.producciones[p][i], self.sufijos[p][i + 1]
+            longitudes, acumulados, total = [], [], 0
+            for m in range(n + 1):
+                peso = self._contar(x, m) * siguiente[n - m]
+                if peso:
+                    total += peso
+                    longitudes.append(m)
+                    acumulados.append(total)
+            datos = self._repartos[(p, i, n)] = (longitudes, acumulados)
+        return datos
+
+    def desclasificar(self, simbolo, longitud, indice, spans=None):
+        """Derivación número `indice` (0 <= indice < conteos) de `simbolo` con `longitud` tokens.
+
+        Retorna la lista de IDs de terminales. Cada nodo cuesta una búsqueda
+        binaria sobre pesos acumulados, que se calculan una vez por (producción,
+        posición, longitud). Con la lista `spans` se le agrega
+        (no_terminal, inicio, fin) por cada subárbol, como en `muestrear`.
+        """
+        if not 0 <= longitud <= self.long_max or not 0 <= indice < self._contar(simbolo, longitud):
+            raise ValueError(f"No hay derivación {indice} de longitud {longitud}")
+
+        tokens = []
+        pila = [(simbolo, longitud, indice)]
+        while pila:
+            s, n, r = pila.pop()
+            if s >= self.num_no_terminales:
+                tokens.append(s)
+                continue
+            if spans is not None:
+                spans.append((s, len(tokens), len(tokens) + n))
+
+            producciones, acumulados = self._eleccion(s, n)
+            k = bisect_right(acumulados, r)
+            p = producciones[k]
+            r -= acumulados[k - 1] if k else 0
+
+            # El resto del índice se descompone en base mixta entre los símbolos
+            partes = []
+            for i, x in enumerate(self.producciones[p]):
+                longitudes, acumulados = self._reparto(p, i, n)
+                k = bisect_right(acumulados, r)
+                m = longitudes[k]
+                r -= acumulados[k - 1] if k else 0
+                resto = self.sufijos[p][i + 1][n - m]
+                partes.append((x, m, r // resto))
+                r %= resto
+                n -= m
+            pila.extend(reversed(partes))
+        return tokens
+
+    def clasificar(self, arbol):
+        """Inverso de `desclasificar`: (longitud, indice) de un árbol de derivación.
+
+        El árbol usa el formato de Reconocedor.arbol: nodos [simbolo, hijos]
+        con hijos None en las hojas.
+        """
+        resultado = {}
+        pila = [(arbol, False)]
+        while pila:
+            nodo, listo = pila.pop()
+            simbolo, hijos = nodo
+            if hijos is None:
+                resultado[id(nodo)] = (1, 0)
+                continue
+            if not listo:
+                pila.append((nodo, True))
+                pila.extend((h, False) for h in hijos)
+                continue
+
+            p = self._produccion.get((simbolo, tuple(h[0] for h in hijos)))
+            if p is None:
+                raise ValueError("El árbol no corresponde a la gramática")
+            medidas = [resultado.pop(id(h)) for h in hijos]
+            n = sum(m for m, _ in medidas)
+            if n > self.long_max:
+                raise ValueError(f"La cadena supera long_max={self.long_max}")
+
+            producciones, acumulados = self._eleccion(simbolo, n)
+            k = producciones.index(p)
+            indice = acumulados[k - 1] if k else 0
+            for i, (m, c) in enumerate(medidas):
+                longitudes, acumulados = self._reparto(p, i, n)
+                k = longitudes.index(m)
+                indice += (acumulados[k - 1] if k else 0) + c * self.sufijos[p][i + 1][n - m]
+                n -= m
+            resultado[id(nodo)] = (sum(m for m, _ in medidas), indice)
+        return resultado[id(arbol)]
+
+    def muestrear(self, simbolo, longitud, rng, spans=None):
+        """Deriva uniformemente una cadena de exactamente `longitud` tokens.
+
+        Elige un índice uniforme entre todas las derivaciones de esa longitud y
+        la arma con `desclasificar`. Retorna la lista de IDs de terminales.
+        """
+        if not 0 <= longitud <= self.long_max or not self._contar(simbolo, longitud):
+            raise ValueError(f"No hay derivaciones de longitud {longitud}")
+        return self.desclasificar(simbolo, longitud, rng.randrange(self.conteos[simbolo][longitud]), spans)
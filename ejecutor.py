@@ -0,0 +1,156 @@
+import asyncio
+import json
+import time
+
+
+class Ejecutor:
+    """Ejecuta casos generados contra un objetivo y compara su veredicto.
+
+    El objetivo puede ser un comando (lista de argumentos) o una función de
+    Python. Un comando recibe un lote de casos por stdin, una cadena por línea,
+    y debe responder una línea por caso que empiece con 1/0 (o true/false,
+    acepta/rechaza). Una función recibe una cadena y retorna True si la acepta.
+
+    Los lotes se reparten entre `concurrencia` tareas asyncio; la cola de lotes
+    está acotada, así que los casos se consumen en flujo (p. ej. desde
+    iter_casos) sin retenerlos. Lo esperado es `aceptada_gramatica` de la
+    clasificación o, si falta, que el tipo no sea "invalida".
+    """
+
+    ACEPTA = {"1", "true", "acepta", "aceptada", "ok"}
+    RECHAZA = {"0", "false", "rechaza", "rechazada", "error"}
+
+    def __init__(self, objetivo, concurrencia=4, tam_lote=100, timeout=60.0):
+        self.objetivo = objetivo
+        self.concurrencia = concurrencia
+        self.tam_lote = tam_lote
+        self.timeout = timeout
+
+    @staticmethod
+    def esperado(caso):
+        """Veredicto esperado de un caso: True si debe aceptarse."""
+        clasificacion = caso.get("clasificacion", {})
+        if "aceptada_gramatica" in clasificacion:
+            return clasificacion["aceptada_gramatica"]
+        return caso["tipo"] != "invalida"
+
+    def interpretar(self, linea):
+        """Convierte una línea de respuesta del objetivo en True/False."""
+        palabra = linea.strip().split(maxsplit=1)[0].lower() if linea.strip() else ""
+        if palabra in self.ACEPTA:
+            return True
+        if palabra in self.RECHAZA:
+            return False
+        raise ValueError(f"respuesta no reconocida: {linea.strip()!r}")
+
+    async def _ejecutar_comando(self, cadenas):
+        """Corre el comando con un lote. Retorna (veredictos, error)."""
+        try:
+            proceso = await asyncio.create_subprocess_exec(
+                *self.objetivo,
+                stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+            )
+        except OSError as e:
+            return None, f"no se pudo ejecutar el objetivo: {e}"
+        entrada = "".join(c + "\n" for c in cadenas).encode('utf-8')
+        try:
+            salida, errores = await asyncio.wait_for(proceso.communicate(entrada), self.timeout)
+        except asyncio.TimeoutError:
+            proceso.kill()
+            await proceso.wait()
+            return None, f"tiempo límite de {self.timeout}s excedido"
+
+        lineas = salida.decode('utf-8', errors='replace').splitlines()
+        if proceso.returncode != 0 or len(lineas) != len(cadenas):
+            detalle = errores.decode('utf-8', errors='replace').strip()[-500:]
+            return None, (f"código {proceso.returncode}, {len(lineas)} respuestas para "
+                          f"{len(cadenas)} casos" + (f": {detalle}" if detalle else ""))
+        try:
+            return [self.interpretar(linea) for linea in lineas], None
+        except ValueError as e:
+            return None, str(e)
+
+    async def _ejecutar_funcion(self, cadenas):
+        def correr():
+            return [bool(self.objetivo(c)) for c in cadenas]
+        try:
+            return await asyncio.to_thread(correr), None
+        except Exception as e:
+            return None, f"{type(e).__name__}: {e}"
+
+    async def _trabajador(self, cola, resumen, salida):
+        ejecutar = self._ejecutar_funcion if callable(self.objetivo) else self._ejecutar_comando
+        while True:
+            lote = await cola.get()
+            if lote is None:
+                return
+            veredictos, error = await ejecutar([caso["cadena"] for caso in lote])
+            resumen["lotes"] += 1
+            discrepancias = []
+            for j, caso in enumerate(lote):
+                esperado = self.esperado(caso)
+                if error is not None:
+                    resumen["errores"] += 1
+                    discrepancias.append(self._discrepancia(caso, esperado, None, error))
+                elif veredictos[j] == esperado:
+                    resumen["coincidencias"] += 1
+                else:
+                    clave = "falsos_positivos" if veredictos[j] else "falsos_negativos"
+                    resumen[clave] += 1
+                    discrepancias.append(self._discrepancia(caso, esperado, veredictos[j], None))
+            if discrepancias and salida is not None:
+                salida.write("".join(json.dumps(d, ensure_ascii=False) + "\n" for d in discrepancias))
+                salida.flush()
+
+    def _discrepancia(self, caso, esperado, obtenido, error):
+        return {
+            "id": caso.get("id"),
+            "tipo": caso.get("tipo"),
+            "cadena": caso["cadena"],
+            "esperado": esperado,
+            "obtenido": obtenido,
+            "error": error
+        }
+
+    async def ejecutar_async(self, casos, archivo_discrepancias=None):
+        """Versión asyncio de `ejecutar`."""
+        resumen = {
+            "total": 0, "coincidencias": 0, "falsos_positivos": 0, "falsos_negativos": 0,
+            "errores": 0, "lotes": 0
+        }
+        inicio = time.perf_counter()
+        cola = asyncio.Queue(maxsize=2 * self.concurrencia)
+        salida = open(archivo_discrepancias, "w", encoding='utf-8') if archivo_discrepancias else None
+        try:
+            trabajadores = [
+                asyncio.create_task(self._trabajador(cola, resumen, salida)) for _ in range(self.concurrencia)
+            ]
+            lote = []
+            for caso in casos:
+                lote.append(caso)
+                resumen["total"] += 1
+                if len(lote) >= self.tam_lote:
+                    await cola.put(lote)
+                    lote = []
+            if lote:
+                await cola.put(lote)
+            for _ in trabajadores:
+                await cola.put(None)
+            await asyncio.gather(*trabajadores)
+        finally:
+            if salida is not None:
+                salida.close()
+
+        tiempo = time.perf_counter() - inicio
+        resumen["discrepancias"] = resumen["falsos_positivos"] + resumen["falsos_negativos"] + resumen["errores"]
+        resumen["tiempo_segundos"] = round(tiempo, 4)
+        resumen["casos_por_segundo"] = round(resumen["total"] / tiempo, 1) if tiempo else 0.0
+        return resumen
+
+    def ejecutar(self, casos, archivo_discrepancias=None):
+        """Ejecuta los casos (dicts con "cadena", "tipo" y "clasificacion") contra el objetivo.
+
+        Las discrepancias y errores se escriben en `archivo_discrepancias`
+        (NDJSON) a medida que aparecen. Retorna un dict de resumen.
+        """
+        return asyncio.run(self.ejecutar_async(casos, archivo_discrepancias))
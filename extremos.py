@@ -0,0 +1,168 @@
+import heapq
+
+
+class ConstructorExtremos:
+    """Construcción directa de casos límite, en tiempo lineal en su longitud.
+
+    A partir de la gramática compilada calcula la cadena terminal más corta de
+    cada no terminal, el contexto más corto que lleva del símbolo inicial a cada
+    no terminal y los ciclos más cortos X =>+ u X v. Repetir un ciclo N veces
+    da u^N min(X) v^N, que pertenece a la gramática por construcción, así que
+    no hay derivación al azar, explosión ni truncamiento:
+
+    - anidamiento: ciclos con u y v no vacíos (p. ej. "( ... )");
+    - cadenas de operadores: ciclos cuyo contexto contiene un operador.
+    """
+
+    def __init__(self, generador):
+        self.num_no_terminales = generador.num_no_terminales
+        self.simbolo_inicial = generador.simbolo_inicial
+        self.operadores = generador._ids_operadores
+        self.producciones = [
+            (lhs, tuple(generador.prod_simbolos[generador.prod_inicio[p]:generador.prod_inicio[p + 1]]))
+            for p, lhs in enumerate(generador.prod_lhs)
+        ]
+        self.minimas = self._cadenas_minimas()
+        self.contextos = self._contextos_desde_inicial()
+        # Pasos X -> a Z b de cada no terminal, con a y b expandidos a sus cadenas mínimas
+        self.pasos = [[] for _ in range(self.num_no_terminales)]
+        for lhs, rhs in self.producciones:
+            for i, z in enumerate(rhs):
+                if z < self.num_no_terminales:
+                    a, b = self._expandir(rhs[:i]), self._expandir(rhs[i + 1:])
+                    con_operador = any(t in self.operadores for t in a + b)
+                    self.pasos[lhs].append((z, a, b, bool(a), bool(b), con_operador))
+        # Ciclos (X, u, v) de cada no terminal alcanzable, si existen
+        self.ciclos_anidamiento = []
+        self.ciclos_operadores = []
+        for x in self.contextos:
+            ciclo = self._ciclo_minimo(x, lambda izq, der, op: izq and der)
+            if ciclo:
+                self.ciclos_anidamiento.append((x,) + ciclo)
+            ciclo = self._ciclo_minimo(x, lambda izq, der, op: op)
+            if ciclo:
+                self.ciclos_operadores.append((x,) + ciclo)
+        # Cadenas más largas: sólo los ciclos con más operadores por token
+        if self.ciclos_operadores:
+            densidad = {c: self._densidad(c) for c in self.ciclos_operadores}
+            mejor = max(densidad.values())
+            self.ciclos_operadores = [c for c in self.ciclos_operadores if densidad[c] == mejor]
+
+    def _densidad(self, ciclo):
+        _, u, v = ciclo
+        return sum(t in self.operadores for t in u + v) / (len(u) + len(v))
+
+    def _expandir(self, simbolos, minimas=None):
+        """Concatena la cadena mínima de cada símbolo (None si alguna falta)."""
+        minimas = self.minimas if minimas is None else minimas
+        cadena = ()
+        for s in simbolos:
+            if s >= self.num_no_terminales:
+                cadena += (s,)
+            elif minimas[s] is None:
+                return None
+            else:
+                cadena += minimas[s]
+        return cadena
+
+    def _cadenas_minimas(self):
+        """Cadena terminal más corta de cada no terminal, por punto fijo."""
+        minimas = [None] * self.num_no_terminales
+        cambio = True
+        while cambio:
+            cambio = False
+            for lhs, rhs in self.producciones:
+                cadena = self._expandir(rhs, minimas)
+                if cadena is not None and (minimas[lhs] is None or len(cadena) < len(minimas[lhs])):
+                    minimas[lhs] = cadena
+                    cambio = True
+        return minimas
+
+    def _contextos_desde_inicial(self):
+        """Contexto (prefijo, sufijo) más corto con inicial =>* prefijo X sufijo."""
+        contextos = {}
+        cola = [(0, self.simbolo_inicial, (), ())]
+        while cola:
+            _, x, prefijo, sufijo = heapq.heappop(cola)
+            if x in contextos:
+                continue
+            contextos[x] = (prefijo, sufijo)
+            for lhs, rhs in self.producciones:
+                if lhs != x:
+                    continue
+                for i, y in enumerate(rhs):
+                    if y < self.num_no_terminales and y not in contextos:
+                        p = prefijo + self._expandir(rhs[:i])
+                        s = self._expandir(rhs[i + 1:]) + sufijo
+                        heapq.heappush(cola, (len(p) + len(s), y, p, s))
+        return contextos
+
+    def _ciclo_minimo(self, x, aceptar):
+        """Ciclo más corto x =>+ u x v cuyas marcas (u no vacío, v no vacío,
+        contiene operador) satisfacen `aceptar`. Retorna (u, v) o None.
+
+        Dijkstra sobre estados (no_terminal, marcas) con costo |u| + |v|. Cada
+        entrada de la cola guarda sólo un enlace a su paso anterior; u y v se
+        arman al encontrar el ciclo.
+        """
+        visitados = set()
+        # El estado inicial (orden 0) no cuenta como ciclo cerrado
+        cola = [(0, 0, x, False, False, False)]
+        enlaces = [None]
+        while cola:
+            costo, n, y, izq, der, op = heapq.heappop(cola)
+            if n:
+                if y == x and aceptar(izq, der, op):
+                    return self._armar_ciclo(enlaces, n)
+                if (y, izq, der, op) in visitados:
+                    continue
+                visitados.add((y, izq, der, op))
+            for z, a, b, con_a, con_b, con_op in self.pasos[y]:
+                marcas = (izq or con_a, der or con_b, op or con_op)
+                if (z,) + marcas in visitados:
+                    continue
+                heapq.heappush(cola, (costo + len(a) + len(b), len(enlaces), z) + marcas)
+                enlaces.append((n, a, b))
+        return None
+
+    def _armar_ciclo(self, enlaces, n):
+        """(u, v) del camino que termina en la entrada n: u = a1 + ... + ak, v = bk + ... + b1."""
+        prefijos, sufijos = [], []
+        while n:
+            n, a, b = enlaces[n]
+            prefijos.append(a)
+            sufijos.append(b)
+        return sum(reversed(prefijos), ()), sum(sufijos, ())
+
+    def _repetir(self, ciclo, veces, long_max):
+        """prefijo u^k min(X) v^k sufijo con k <= veces, el mayor que cabe en long_max.
+
+        Retorna (ids, k), o None si ni siquiera k = 0 cabe en long_max.
+        """
+        x, u, v = ciclo
+        prefijo, sufijo = self.contextos[x]
+        base = len(prefijo) + len(self.minimas[x]) + len(sufijo)
+        if base > long_max:
+            return None
+        paso = len(u) + len(v)
+        k = min(veces, (long_max - base) // paso)
+        return list(prefijo + u * k + self.minimas[x] + v * k + sufijo), k
+
+    def _elegir_ciclo(self, ciclos, long_max, rng):
+        """Un ciclo al azar entre los que caben en long_max, o None."""
+        ciclos = [c for c in ciclos if self._repetir(c, 0, long_max) is not None]
+        return rng.choice(ciclos) if ciclos else None
+
+    def anidamiento(self, niveles, long_max, rng):
+        """IDs de una cadena con `niveles` anidamientos (menos si no caben en long_max).
+
+        Retorna (ids, niveles_logrados) o None si la gramática no anida o el
+        caso no cabe en long_max.
+        """
+        ciclo = self._elegir_ciclo(self.ciclos_anidamiento, long_max, rng)
+        return self._repetir(ciclo, niveles, long_max) if ciclo else None
+
+    def cadena_operadores(self, long_max, rng):
+        """IDs de la cadena de operadores más larga que cabe en long_max, o None."""
+        ciclo = self._elegir_ciclo(self.ciclos_operadores, long_max, rng)
+        return self._repetir(ciclo, long_max, long_max)[0] if ciclo else None
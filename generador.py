@@ -1,230 +1,1174 @@
 import random
 import json
+import os
+import sys
 import time
+import hashlib
+import argparse
+import shlex
+import threading
+from bisect import bisect_right
+from collections import namedtuple
+from array import array
+import pickle
+import platform
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
+from acumuladores import AcumuladorReporte
+from almacen import AlmacenCasos, clasificacion, materializar_caso, metricas
+from conteo import TablaConteo
+from reconocedor import Reconocedor
+from subarboles import PoolSubarboles
+from cobertura import Cobertura, FiltroBloom
+from extremos import ConstructorExtremos
+from perfilado import PerfilEjecucion
+from ejecutor import Ejecutor
+from minimizador import Minimizador, oraculo_discrepancia
+
+# Configuración inmutable de una llamada: se toma una instantánea de `config`
+# al empezar, así que cambiarla (p. ej. desde otro hilo) no afecta una generación en curso
+ConfigGeneracion = namedtuple("ConfigGeneracion", [
+    "prof_max", "long_max", "dist_valida", "dist_invalida", "muestreo",
+    "mutantes_por_semilla", "reuso_subarboles", "capacidad_pool",
+    "cobertura_k", "guia_cobertura", "deduplicar", "capacidad_dedup"
+])
 
 class GeneradorCasosPrueba:
-    """Generador automático de casos de prueba desde gramática libre de contexto."""
+    """Generador automático de casos de prueba desde gramática libre de contexto.
+    
+    Varios hilos pueden generar con la misma instancia: cada llamada usa una
+    instantánea de `config`, sus propias listas de derivación y un lote de
+    mutantes por hilo. El pool de subárboles y la cobertura se comparten bajo
+    un cerrojo propio. Siguen compartidos `rng` (la secuencia deja de ser
+    reproducible entre hilos) y `acumulador`; para estadísticas o resultados
+    reproducibles por hilo conviene un generador por hilo.
+    """
     
     TIPOS_MUTACION = ["eliminar", "duplicar", "insertar", "reemplazar"]
+    TIPOS_MUTACION_ESTRUCTURAL = ["multipunto", "intercambio_subarbol", "invertir_operador"]
+    INTENTOS_MUTACION = 10
+    # Regeneraciones de un caso repetido antes de aceptarlo igual
+    REINTENTOS_DUPLICADO = 20
     TOKENS_BASURA = ["+", "*", "(", ")", "ERROR", "##", "??", "NULL"]
+    CRITERIOS_EXTREMOS = ["profundidad", "longitud", "operadores"]
+    
+    OPERADORES = AcumuladorReporte.OPERADORES
+    # Código por token para el análisis en una pasada: operadores 0-3, "(" 4, ")" 5
+    _CODIGOS_ANALISIS = {op: i for i, op in enumerate(OPERADORES)}
+    _CODIGOS_ANALISIS.update({"(": 4, ")": 5})
+    _BASURA = frozenset(TOKENS_BASURA)
+    
+    # Caché en disco de gramáticas compiladas, indexada por el hash del archivo
+    DIR_CACHE = os.path.join(os.path.expanduser("~"), ".cache", "generador_casos")
+    # Incluye las tablas del reconocedor: cambiar su construcción exige subir la versión
+    VERSION_CACHE = 3
+    CAMPOS_COMPILADOS = (
+        "gramatica", "simbolos", "ids_simbolo", "num_no_terminales", "simbolo_inicial",
+        "prod_lhs", "prod_inicio", "prod_simbolos", "_expansiones", "_expansiones_corte",
+        "analisis_gramatica"
+    )
     
     def __init__(self):
         self.gramatica = {}
-        self.resultados = []
-        self.estadisticas = {"valida": 0, "invalida": 0, "extrema": 0}
+        # Gramática compilada: símbolos como enteros y tablas planas de producciones
+        self.simbolos = []
+        self.ids_simbolo = {}
+        self.num_no_terminales = 0
+        self.prod_lhs = []
+        self.prod_inicio = [0]
+        self.prod_simbolos = []
+        self._expansiones = []
+        self._expansiones_corte = []
+        self.simbolo_inicial = None
+        self.analisis_gramatica = {}
+        self._ids_operadores = frozenset()
+        # Estado propio de cada hilo (lote de mutantes pendientes)
+        self._por_hilo = threading.local()
+        # Protege la creación bajo demanda del pool de subárboles y de la cobertura
+        self._cerrojo_derivados = threading.Lock()
+        self._tabla_conteo = None
+        # long_max con el que no se puede muestrear con la tabla de conteo
+        self._long_max_sin_conteo = None
+        self._reconocedor = None
+        self._constructor_extremos = None
+        self.pool_subarboles = None
+        self.cobertura = None
+        # Clave en la caché de la gramática cargada, para guardar el reconocedor al construirlo
+        self._clave_cache = None
+        self.filtro_duplicados = None
+        self.deduplicacion = {}
+        self.repetidos_emitidos = 0
+        self.resultados = AlmacenCasos()
+        self.acumulador = AcumuladorReporte()
+        self.estadisticas = self.acumulador.por_tipo
         self.tiempo_inicio = 0
-        self.tiempos_por_tipo = {"valida": [], "invalida": [], "extrema": []}
+        self.tiempo_fin = None
+        # Instrumentación: ganchos por fase y perfil opcional de una ejecución
+        self.ganchos = []
+        self.perfil = None
+        self._perfil_pendiente = None
+        # Fuente de aleatoriedad: el módulo random global salvo que se siembre una propia
+        self.rng = random
         self.config = {
             "prof_max": 5,
             "long_max": 50,
             "dist_valida": 50,
-            "dist_invalida": 30
+            "dist_invalida": 30,
+            "muestreo": "truncamiento",
+            "mutantes_por_semilla": 1,
+            "reuso_subarboles": 0.0,
+            "capacidad_pool": 200000,
+            "cobertura_k": 0,
+            "guia_cobertura": 1.0,
+            "deduplicar": False,
+            "capacidad_dedup": 10000000
         }
         
-    def cargar_gramatica(self, nombre_archivo):
-        """Carga gramática desde archivo .txt"""
+    def cargar_gramatica(self, nombre_archivo, usar_cache=True):
+        """Carga gramática desde archivo .txt
+        
+        El símbolo inicial es el lado izquierdo de la primera regla. La gramática
+        compilada y su análisis se guardan en DIR_CACHE, indexados por el hash
+        del archivo, para que las siguientes cargas no repitan el trabajo. Las
+        tablas del reconocedor, que en gramáticas grandes son lo más costoso, se
+        agregan a la misma entrada la primera vez que se construyen.
+        """
         self.gramatica = {}
+        self._clave_cache = None
         try:
-            with open(nombre_archivo, 'r', encoding='utf-8') as f:
-                for linea in f:
-                    linea = linea.strip()
-                    if not linea or "->" not in linea:
-                        continue
-                    
-                    izq, der = linea.split("->", 1)
-                    clave = izq.strip()
-                    opciones = [op.strip().split() for op in der.split("|")]
-                    self.gramatica[clave] = opciones
-            return bool(self.gramatica)
+            with open(nombre_archivo, 'rb') as f:
+                contenido = f.read()
         except FileNotFoundError:
             return False
+        
+        clave = hashlib.sha256(contenido).hexdigest()
+        if usar_cache and self._cargar_cache(clave):
+            self._clave_cache = clave
+            return self._gramatica_utilizable()
+        
+        for linea in contenido.decode('utf-8').splitlines():
+            linea = linea.strip()
+            if not linea or "->" not in linea:
+                continue
+            
+            izq, der = linea.split("->", 1)
+            clave_nt = izq.strip()
+            opciones = [op.strip().split() for op in der.split("|")]
+            self.gramatica[clave_nt] = opciones
+        self._compilar_gramatica()
+        if usar_cache:
+            self._guardar_cache(clave, {campo: getattr(self, campo) for campo in self.CAMPOS_COMPILADOS})
+            self._clave_cache = clave
+        return self._gramatica_utilizable()
     
-    def derivar(self, simbolo, prof_actual=0):
-        """Deriva recursivamente desde un símbolo. Retorna cadena."""
-        if simbolo not in self.gramatica:
-            return simbolo
+    def advertencias_gramatica(self):
+        """Mensajes sobre no terminales improductivos o inalcanzables de la gramática cargada."""
+        analisis = self.analisis_gramatica
+        advertencias = []
+        if analisis.get("improductivos"):
+            advertencias.append("No terminales improductivos (sus producciones se descartan): "
+                                + ", ".join(analisis["improductivos"]))
+        if analisis.get("inalcanzables"):
+            advertencias.append(f"No terminales inalcanzables desde {analisis['simbolo_inicial']}: "
+                                + ", ".join(analisis["inalcanzables"]))
+        return advertencias
+    
+    def _gramatica_utilizable(self):
+        """Hay gramática y su símbolo inicial deriva al menos una cadena terminal."""
+        return self.simbolo_inicial is not None and bool(self._expansiones[self.simbolo_inicial])
+    
+    def _ruta_cache(self, clave):
+        return os.path.join(self.DIR_CACHE, f"{clave}.v{self.VERSION_CACHE}.pickle")
+    
+    def _leer_cache(self, clave):
+        """Entrada de la caché para `clave`, o None si no está o no se puede leer."""
+        try:
+            with open(self._ruta_cache(clave), 'rb') as f:
+                return pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return None
+    
+    def _cargar_cache(self, clave):
+        """Restaura la gramática compilada desde la caché. Retorna False si no está."""
+        estado = self._leer_cache(clave)
+        if estado is None:
+            return False
+        for campo in self.CAMPOS_COMPILADOS:
+            setattr(self, campo, estado[campo])
+        self._reiniciar_derivados()
+        self._reconocedor = estado.get("reconocedor")
+        return True
+    
+    def _guardar_cache(self, clave, estado):
+        """Escribe una entrada de la caché; un fallo de escritura no es un error."""
+        ruta = self._ruta_cache(clave)
+        try:
+            os.makedirs(self.DIR_CACHE, exist_ok=True)
+            temporal = f"{ruta}.{os.getpid()}.tmp"
+            with open(temporal, 'wb') as f:
+                pickle.dump(estado, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temporal, ruta)
+        except OSError:
+            pass
+    
+    def _id_simbolo(self, nombre):
+        """Retorna el ID entero de un símbolo, registrándolo si es nuevo."""
+        if nombre not in self.ids_simbolo:
+            self.ids_simbolo[nombre] = len(self.simbolos)
+            self.simbolos.append(nombre)
+        return self.ids_simbolo[nombre]
+    
+    def _compilar_gramatica(self):
+        """Compila la gramática a IDs enteros y tablas planas de producciones.
+        
+        Los no terminales ocupan los IDs 0..num_no_terminales-1 y los terminales
+        el resto. La producción p tiene lado izquierdo prod_lhs[p] y lado derecho
+        prod_simbolos[prod_inicio[p]:prod_inicio[p + 1]]. Las producciones que
+        usan símbolos improductivos se descartan (no derivan ninguna cadena).
+        """
+        self._clave_cache = None
+        self.simbolos, self.ids_simbolo = [], {}
+        for nt in self.gramatica:
+            self._id_simbolo(nt)
+        self.num_no_terminales = len(self.simbolos)
+        self.simbolo_inicial = 0 if self.gramatica else None
+        
+        reglas = [
+            (self.ids_simbolo[nt], [self._id_simbolo(s) for s in op])
+            for nt, opciones in self.gramatica.items() for op in opciones
+        ]
+        # Los tokens de las mutaciones se registran aquí: generar sólo lee las tablas de símbolos
+        for token in self.TOKENS_BASURA:
+            self._id_simbolo(token)
+        altura = self._analizar_gramatica(reglas)
+        
+        self.prod_lhs, self.prod_inicio, self.prod_simbolos = [], [0], []
+        self._expansiones = [[] for _ in range(self.num_no_terminales)]
+        self._expansiones_corte = [[] for _ in range(self.num_no_terminales)]
+        for id_nt, ids in reglas:
+            altura_prod = self._altura_produccion(ids, altura)
+            if altura_prod is None:
+                continue
+            self.prod_lhs.append(id_nt)
+            self.prod_simbolos.extend(ids)
+            self.prod_inicio.append(len(self.prod_simbolos))
+            # Lados derechos invertidos, listos para apilar
+            expansion = tuple(reversed(ids))
+            self._expansiones[id_nt].append(expansion)
+            # Producciones que terminan lo antes posible: usadas al alcanzar prof_max
+            if altura_prod == altura[id_nt]:
+                self._expansiones_corte[id_nt].append(expansion)
+        self._reiniciar_derivados()
+    
+    def _reiniciar_derivados(self):
+        """Descarta las estructuras que dependen de la gramática compilada."""
+        self._ids_operadores = frozenset(self.ids_simbolo[op] for op in self.OPERADORES if op in self.ids_simbolo)
+        self._por_hilo = threading.local()
+        self._tabla_conteo = None
+        # long_max con el que no se puede muestrear con la tabla de conteo
+        self._long_max_sin_conteo = None
+        self._reconocedor = None
+        self._constructor_extremos = None
+        self.pool_subarboles = None
+        self.cobertura = None
+    
+    def _altura_produccion(self, ids, altura):
+        """Profundidad mínima para terminar una producción (None si no puede)."""
+        hijos = [altura[s] for s in ids if s < self.num_no_terminales]
+        if any(h is None for h in hijos):
+            return None
+        return 1 + max(hijos, default=0)
+    
+    def _analizar_gramatica(self, reglas):
+        """Analiza la gramática: alturas mínimas, improductivos e inalcanzables.
         
-        prof_max = self.config["prof_max"]
+        La altura de un no terminal es la profundidad mínima de un árbol de
+        derivación que lo lleva a terminales. Al alcanzar prof_max sólo se usan
+        producciones de altura mínima, por lo que la derivación siempre termina
+        en a lo sumo prof_max + altura(inicial) niveles, aun con recursión indirecta.
+        """
+        altura = [None] * self.num_no_terminales
+        cambio = True
+        while cambio:
+            cambio = False
+            for id_nt, ids in reglas:
+                h = self._altura_produccion(ids, altura)
+                if h is not None and (altura[id_nt] is None or h < altura[id_nt]):
+                    altura[id_nt] = h
+                    cambio = True
         
-        # Evitar recursión infinita
-        if prof_actual >= prof_max:
-            opciones = [op for op in self.gramatica[simbolo] if simbolo not in op]
-            produccion = random.choice(opciones) if opciones else ["id"]
+        improductivos = {nt for nt in range(self.num_no_terminales) if altura[nt] is None}
+        sucesores = [set() for _ in range(self.num_no_terminales)]
+        for id_nt, ids in reglas:
+            if self._altura_produccion(ids, altura) is not None:
+                sucesores[id_nt].update(s for s in ids if s < self.num_no_terminales)
+        
+        alcanzables = set()
+        if self.simbolo_inicial is not None and self.simbolo_inicial not in improductivos:
+            pendientes = [self.simbolo_inicial]
+            alcanzables.add(self.simbolo_inicial)
+            while pendientes:
+                for s in sucesores[pendientes.pop()] - alcanzables:
+                    alcanzables.add(s)
+                    pendientes.append(s)
+        
+        nombres = self.simbolos
+        self.analisis_gramatica = {
+            "simbolo_inicial": nombres[self.simbolo_inicial] if self.simbolo_inicial is not None else None,
+            "altura_minima": {nombres[nt]: altura[nt] for nt in range(self.num_no_terminales)},
+            "improductivos": sorted(nombres[nt] for nt in improductivos),
+            "inalcanzables": sorted(nombres[nt] for nt in range(self.num_no_terminales)
+                                    if nt not in alcanzables and nt not in improductivos)
+        }
+        return altura
+    
+    def _derivar_ids(self, simbolo, prof_max, prof_actual=0, spans=None):
+        """Deriva desde un ID de símbolo con pila explícita.
+        
+        Retorna una lista nueva con los IDs de los terminales.
+        Los símbolos se expanden en preorden, de izquierda a derecha. Si se pasa
+        la lista `spans`, se le agrega (no_terminal, inicio, fin) por cada
+        subárbol, usando marcas de cierre negativas en la pila.
+        """
+        buffer = []
+        num_nt = self.num_no_terminales
+        expansiones, expansiones_corte = self._expansiones, self._expansiones_corte
+        elegir = self.rng.choice
+        
+        pila, profundidades = [simbolo], [prof_actual]
+        while pila:
+            s = pila.pop()
+            prof = profundidades.pop()
+            if s >= num_nt:
+                buffer.append(s)
+                continue
+            if s < 0:
+                spans.append((-s - 1, prof, len(buffer)))
+                continue
+            if spans is not None:
+                # Marca de cierre del subárbol; en lugar de profundidad guarda el inicio
+                pila.append(-s - 1)
+                profundidades.append(len(buffer))
+            
+            # Al llegar a prof_max sólo se eligen producciones que terminan antes
+            if prof >= prof_max:
+                expansion = elegir(expansiones_corte[s])
+            else:
+                expansion = elegir(expansiones[s])
+            
+            pila.extend(expansion)
+            profundidades.extend([prof + 1] * len(expansion))
+        return buffer
+    
+    def _pool(self, capacidad):
+        """Pool de subárboles, creado bajo demanda con la capacidad indicada."""
+        with self._cerrojo_derivados:
+            if self.pool_subarboles is None or self.pool_subarboles.capacidad_tokens != capacidad:
+                self.pool_subarboles = PoolSubarboles(capacidad)
+            return self.pool_subarboles
+    
+    def _cobertura(self, k):
+        """Registro de cobertura de k-caminos, creado bajo demanda."""
+        with self._cerrojo_derivados:
+            if self.cobertura is None or self.cobertura.k != k:
+                self.cobertura = Cobertura(self, k)
+            return self.cobertura
+    
+    def _derivar_ids_cobertura(self, simbolo, cfg, spans=None):
+        """Deriva como _derivar_ids, registrando y guiando la cobertura.
+        
+        Cada no terminal pendiente lleva su contexto (las últimas k-1
+        producciones de su rama) y la producción la elige Cobertura.elegir,
+        que con probabilidad guia_cobertura prefiere lo que falta cubrir.
+        """
+        cobertura, guia, prof_max = self._cobertura(cfg.cobertura_k), cfg.guia_cobertura, cfg.prof_max
+        buffer = []
+        num_nt = self.num_no_terminales
+        expansiones, elegir, rng = cobertura.expansiones, cobertura.elegir, self.rng
+        largo_contexto = cfg.cobertura_k - 1
+        
+        pila, profundidades, contextos = [simbolo], [0], [()]
+        while pila:
+            s = pila.pop()
+            prof = profundidades.pop()
+            contexto = contextos.pop()
+            if s >= num_nt:
+                buffer.append(s)
+                continue
+            if s < 0:
+                spans.append((-s - 1, prof, len(buffer)))
+                continue
+            if spans is not None:
+                pila.append(-s - 1)
+                profundidades.append(len(buffer))
+                contextos.append(None)
+            
+            p = elegir(s, contexto, prof >= prof_max, rng, guia)
+            expansion = expansiones[p]
+            hijo = (contexto + (p,))[-largo_contexto:] if largo_contexto else ()
+            pila.extend(expansion)
+            profundidades.extend([prof + 1] * len(expansion))
+            contextos.extend([hijo] * len(expansion))
+        return buffer
+    
+    def _derivar_ids_pool(self, simbolo, cfg):
+        """Deriva como _derivar_ids, reutilizando subárboles del pool.
+        
+        Al expandir un no terminal con suficiente profundidad restante, con
+        probabilidad reuso_subarboles se busca un fragmento para
+        (no_terminal, profundidad_restante). Si existe se copia tal cual; si no,
+        el subárbol se deriva y se guarda en el pool al cerrarse.
+        """
+        pool, reuso, prof_max = self._pool(cfg.capacidad_pool), cfg.reuso_subarboles, cfg.prof_max
+        buffer = []
+        num_nt = self.num_no_terminales
+        expansiones, expansiones_corte = self._expansiones, self._expansiones_corte
+        rng = self.rng
+        elegir = rng.choice
+        
+        pila, profundidades, aperturas = [simbolo], [0], []
+        while pila:
+            s = pila.pop()
+            prof = profundidades.pop()
+            if s >= num_nt:
+                buffer.append(s)
+                continue
+            if s < 0:
+                clave, inicio = aperturas.pop()
+                pool.guardar(clave, buffer[inicio:], rng)
+                continue
+            
+            restante = prof_max - prof
+            if restante >= pool.RESTANTE_MINIMO and rng.random() < reuso:
+                fragmento = pool.obtener((s, restante), rng)
+                if fragmento is not None:
+                    buffer.extend(fragmento)
+                    continue
+                # Fallo: derivar el subárbol y guardarlo al cerrarse
+                pila.append(-1)
+                profundidades.append(prof)
+                aperturas.append(((s, restante), len(buffer)))
+            
+            if prof >= prof_max:
+                expansion = elegir(expansiones_corte[s])
+            else:
+                expansion = elegir(expansiones[s])
+            
+            pila.extend(expansion)
+            profundidades.extend([prof + 1] * len(expansion))
+        return buffer
+    
+    def _materializar(self, ids):
+        """Convierte una secuencia de IDs de símbolos en lista de tokens."""
+        simbolos = self.simbolos
+        return [simbolos[i] for i in ids]
+    
+    def configuracion(self, **cambios):
+        """Instantánea inmutable (ConfigGeneracion) de `config` con `cambios` aplicados."""
+        return ConfigGeneracion(**dict(self.config, **cambios))
+    
+    def tabla_conteo(self, long_max=None):
+        """Tabla de conteo de derivaciones hasta long_max, calculada bajo demanda."""
+        if long_max is None:
+            long_max = self.config["long_max"]
+        if self._tabla_conteo is None or self._tabla_conteo.long_max != long_max:
+            self._tabla_conteo = TablaConteo(self, long_max)
+        return self._tabla_conteo
+    
+    def reconocedor(self):
+        """Reconocedor (SLR o Earley) de la gramática cargada, construido bajo demanda.
+        
+        Si la gramática vino de cargar_gramatica con caché, sus tablas se agregan
+        a la entrada ya guardada (que sólo tiene el estado de la compilación) para
+        que las siguientes cargas no las reconstruyan.
+        """
+        if self._reconocedor is None:
+            self._reconocedor = Reconocedor(self, self.simbolo_inicial)
+            estado = self._leer_cache(self._clave_cache) if self._clave_cache is not None else None
+            if estado is not None and estado.get("reconocedor") is None:
+                estado["reconocedor"] = self._reconocedor
+                self._guardar_cache(self._clave_cache, estado)
+        return self._reconocedor
+    
+    def constructor_extremos(self):
+        """Constructor directo de casos límite, construido bajo demanda."""
+        if self._constructor_extremos is None:
+            self._constructor_extremos = ConstructorExtremos(self)
+        return self._constructor_extremos
+    
+    def verificar(self, cadenas):
+        """Verifica un lote de cadenas contra la gramática.
+        
+        Retorna una lista de tuplas (aceptada, posicion_error).
+        """
+        return self.reconocedor().verificar(cadenas)
+    
+    def generar_valida_longitud(self, longitud=None, distribucion=None):
+        """Genera una cadena válida de longitud exacta por muestreo con conteo.
+        
+        Sin `longitud`, la elige según `distribucion` (ver TablaConteo.elegir_longitud).
+        No hay truncamiento ni rechazo: la cadena siempre pertenece a la gramática.
+        """
+        tabla = self.tabla_conteo()
+        inicial = self.simbolo_inicial
+        if longitud is None:
+            longitud = tabla.elegir_longitud(inicial, self.rng, distribucion)
+        return " ".join(self._materializar(tabla.muestrear(inicial, longitud, self.rng)))
+    
+    def _acumulados_enumeracion(self, long_max):
+        """Tabla de conteo y cantidad acumulada de cadenas por longitud (0..long_max)."""
+        tabla = self.tabla_conteo(long_max)
+        acumulados, total = [], 0
+        for conteo in tabla.conteos[self.simbolo_inicial]:
+            total += conteo
+            acumulados.append(total)
+        return tabla, acumulados
+    
+    def total_enumeracion(self, long_max=None):
+        """Cantidad de cadenas (derivaciones) de hasta long_max tokens."""
+        return self._acumulados_enumeracion(long_max)[1][-1]
+    
+    def cadena_en(self, indice, long_max=None):
+        """Unrank: la cadena número `indice` de la enumeración, sin generar las anteriores.
+        
+        La enumeración ordena por longitud y, dentro de cada longitud, por el
+        orden de TablaConteo.desclasificar.
+        """
+        tabla, acumulados = self._acumulados_enumeracion(long_max)
+        if not 0 <= indice < acumulados[-1]:
+            raise ValueError(f"Índice {indice} fuera de la enumeración (total {acumulados[-1]})")
+        longitud = bisect_right(acumulados, indice)
+        anterior = acumulados[longitud - 1] if longitud else 0
+        ids = tabla.desclasificar(self.simbolo_inicial, longitud, indice - anterior)
+        return " ".join(self._materializar(ids))
+    
+    def indice_de(self, cadena, long_max=None):
+        """Rank: posición de `cadena` en la enumeración (inverso de cadena_en).
+        
+        Necesita el árbol de derivación, así que sólo funciona con reconocedor SLR.
+        """
+        arbol = self.reconocedor().arbol(cadena.split())
+        if arbol is None:
+            raise ValueError("La cadena no pertenece a la gramática o el reconocedor no es SLR")
+        tabla, acumulados = self._acumulados_enumeracion(long_max)
+        longitud, indice = tabla.clasificar(arbol)
+        return (acumulados[longitud - 1] if longitud else 0) + indice
+    
+    def enumerar(self, long_max=None, desde=0, hasta=None):
+        """Genera perezosamente (indice, cadena) de la enumeración en [desde, hasta).
+        
+        Cada cadena se arma directamente desde su índice, así que rangos
+        disjuntos (ver rangos_enumeracion) se pueden recorrer en procesos o
+        máquinas distintas sin coordinación.
+        """
+        tabla, acumulados = self._acumulados_enumeracion(long_max)
+        hasta = acumulados[-1] if hasta is None else min(hasta, acumulados[-1])
+        inicial = self.simbolo_inicial
+        indice = max(desde, 0)
+        while indice < hasta:
+            longitud = bisect_right(acumulados, indice)
+            anterior = acumulados[longitud - 1] if longitud else 0
+            for local in range(indice - anterior, min(hasta, acumulados[longitud]) - anterior):
+                yield indice, " ".join(self._materializar(tabla.desclasificar(inicial, longitud, local)))
+                indice += 1
+    
+    def rangos_enumeracion(self, partes, long_max=None):
+        """Divide la enumeración en `partes` rangos (desde, hasta) disjuntos y contiguos."""
+        total = self.total_enumeracion(long_max)
+        return [(total * k // partes, total * (k + 1) // partes) for k in range(partes)]
+    
+    def _generar_valida_tokens(self, cfg):
+        """Genera los tokens de una cadena válida, truncados a long_max.
+        
+        Con cobertura_k > 0 la derivación registra y guía la cobertura; si no,
+        con reuso_subarboles > 0 reutiliza subárboles del pool. Con muestreo
+        "conteo" se usa la tabla de conteo mientras se pueda (ver _muestreo_conteo).
+        """
+        if cfg.muestreo == "conteo":
+            ids = self._muestreo_conteo(cfg, self._longitud_al_azar)
+            if ids is not None:
+                return self._materializar(ids)
+        
+        if cfg.cobertura_k > 0:
+            ids = self._derivar_ids_cobertura(self.simbolo_inicial, cfg)
+        elif cfg.reuso_subarboles > 0:
+            ids = self._derivar_ids_pool(self.simbolo_inicial, cfg)
         else:
-            produccion = random.choice(self.gramatica[simbolo])
+            ids = self._derivar_ids(self.simbolo_inicial, cfg.prof_max)
         
-        return " ".join(self.derivar(s, prof_actual + 1) for s in produccion)
+        # Validar longitud máxima
+        return self._materializar(ids[:cfg.long_max])
+    
+    def derivar(self, simbolo, prof_actual=0):
+        """Deriva desde un símbolo. Retorna cadena (el propio símbolo si no es de la gramática)."""
+        id_simbolo = self.ids_simbolo.get(simbolo)
+        if id_simbolo is None:
+            return simbolo
+        ids = self._derivar_ids(id_simbolo, self.config["prof_max"], prof_actual)
+        return " ".join(self._materializar(ids))
     
     def generar_valida(self):
         """Genera cadena válida según gramática."""
-        cadena = self.derivar("E")
-        tokens = cadena.split()
+        return " ".join(self._generar_valida_tokens(self.configuracion()))
+    
+    def _semilla_mutacion(self, cfg):
+        """Deriva una cadena válida como arreglo de IDs junto con sus subárboles."""
+        spans = []
+        ids = None
+        if cfg.muestreo == "conteo":
+            ids = self._muestreo_conteo(cfg, self._longitud_al_azar, spans)
+        if ids is None:
+            if cfg.cobertura_k > 0:
+                ids = self._derivar_ids_cobertura(self.simbolo_inicial, cfg, spans)
+            else:
+                ids = self._derivar_ids(self.simbolo_inicial, cfg.prof_max, spans=spans)
         
-        # Validar longitud máxima
-        if len(tokens) > self.config["long_max"]:
-            tokens = tokens[:self.config["long_max"]]
+        # Validar longitud máxima; cada token también cuenta como subárbol (hoja)
+        ids = array('i', ids[:cfg.long_max])
+        spans = [sp for sp in spans if sp[2] <= len(ids)]
+        spans.extend((t, i, i + 1) for i, t in enumerate(ids))
+        return ids, spans
+    
+    def _mutar(self, ids, tipo, spans):
+        """Aplica una mutación a un arreglo de IDs y retorna (nuevo_arreglo, tipo_aplicado).
+        
+        Las mutaciones estructurales que no se pueden aplicar a la semilla
+        (p. ej. sin operadores) recurren a una mutación puntual.
+        """
+        rng = self.rng
+        if tipo == "invertir_operador":
+            posiciones = [i for i in range(len(ids) - 1) if ids[i] in self._ids_operadores]
+            if posiciones:
+                i = rng.choice(posiciones)
+                mutante = array('i', ids)
+                mutante[i], mutante[i + 1] = mutante[i + 1], mutante[i]
+                return mutante, tipo
+            tipo = rng.choice(self.TIPOS_MUTACION)
+        elif tipo == "intercambio_subarbol":
+            # Dos subárboles disjuntos de distinto símbolo intercambian lugar
+            for _ in range(8 if len(spans) > 1 else 0):
+                (nt1, a1, b1), (nt2, a2, b2) = sorted(rng.sample(spans, 2), key=lambda sp: sp[1])
+                if nt1 != nt2 and b1 <= a2 and a1 < b1 and a2 < b2:
+                    return ids[:a1] + ids[a2:b2] + ids[b1:a2] + ids[a1:b1] + ids[b2:], tipo
+            tipo = rng.choice(self.TIPOS_MUTACION)
+        elif tipo == "multipunto":
+            mutante = ids
+            for _ in range(rng.randint(2, 3)):
+                mutante = self._mutar(mutante, rng.choice(self.TIPOS_MUTACION), ())[0]
+            return mutante, tipo
         
-        return " ".join(tokens)
+        if not ids:
+            return array('i', [self.ids_simbolo[rng.choice(self.TOKENS_BASURA)]]), "insertar"
+        idx = rng.randint(0, len(ids) - 1)
+        if tipo == "eliminar":
+            return ids[:idx] + ids[idx + 1:], tipo
+        if tipo == "duplicar":
+            return ids[:idx + 1] + ids[idx:], tipo
+        if tipo == "insertar":
+            basura = array('i', [self.ids_simbolo[rng.choice(self.TOKENS_BASURA)]])
+            return ids[:idx] + basura + ids[idx:], tipo
+        mutante = array('i', ids)
+        mutante[idx] = self.ids_simbolo[rng.choice(["??", "ERROR", "NULL"])]
+        return mutante, tipo
     
-    def generar_invalida(self):
-        """Genera cadena inválida por mutación sintáctica."""
-        cadena = self.generar_valida()
-        tokens = cadena.split()
+    def generar_mutantes(self, cantidad, cfg=None, fases=None):
+        """Deriva una sola semilla válida y produce hasta `cantidad` mutantes de ella.
         
-        if not tokens:
-            return "id +", "fallback"
+        Los tipos recorren TIPOS_MUTACION y TIPOS_MUTACION_ESTRUCTURAL en forma
+        circular desde una posición aleatoria, así que un lote cubre todos los
+        tipos. Se descartan los mutantes que la gramática acepta. Retorna una
+        lista de (arreglo_de_ids, tipo). Si se da el dict `fases`, suma en ns lo
+        que toma derivar la semilla ("derivar"), mutarla ("mutar") y descartar
+        los mutantes aceptados ("clasificar").
+        """
+        t = time.perf_counter_ns()
+        ids, spans = self._semilla_mutacion(cfg or self.configuracion())
+        t = self._medir(fases, "derivar", t)
+        if not ids:
+            return []
         
-        tipo = random.choice(self.TIPOS_MUTACION)
-        idx = random.randint(0, len(tokens) - 1)
+        tipos = self.TIPOS_MUTACION + self.TIPOS_MUTACION_ESTRUCTURAL
+        inicio = self.rng.randrange(len(tipos))
+        mutantes = [self._mutar(ids, tipos[(inicio + j) % len(tipos)], spans) for j in range(cantidad)]
+        t = self._medir(fases, "mutar", t)
         
-        mutaciones = {
-            "eliminar": lambda: tokens.pop(idx) or tokens,
-            "duplicar": lambda: tokens.insert(idx, tokens[idx]) or tokens,
-            "insertar": lambda: tokens.insert(idx, random.choice(self.TOKENS_BASURA)) or tokens,
-            "reemplazar": lambda: tokens.__setitem__(idx, random.choice(["??", "ERROR", "NULL"])) or tokens
-        }
+        reconocer, simbolos = self.reconocedor().reconocer, self.simbolos
+        rechazados = [(m, tipo) for m, tipo in mutantes if not reconocer([simbolos[i] for i in m])[0]]
+        self._medir(fases, "clasificar", t)
+        return rechazados
+    
+    def _generar_invalida_tokens(self, cfg, fases=None):
+        """Genera los tokens de una cadena inválida por mutación sintáctica.
         
-        mutaciones[tipo]()
+        Los mutantes se producen por lotes de `mutantes_por_semilla` a partir de
+        una misma derivación y se entregan uno por caso. `fases` es como en
+        generar_mutantes; entregar un mutante ya hecho cuenta como "mutar".
+        """
+        pendientes = getattr(self._por_hilo, "mutantes", None)
+        if pendientes is None:
+            pendientes = self._por_hilo.mutantes = []
+        t = time.perf_counter_ns()
+        for _ in range(self.INTENTOS_MUTACION):
+            if pendientes:
+                ids, tipo = pendientes.pop()
+                tokens = self._materializar(ids)
+                self._medir(fases, "mutar", t)
+                return tokens, tipo
+            pendientes.extend(reversed(self.generar_mutantes(cfg.mutantes_por_semilla, cfg, fases)))
+            t = time.perf_counter_ns()
+        # Sin mutantes rechazados: la cadena más corta de la gramática más un token ajeno a ella
+        minima = self.constructor_extremos().minimas[self.simbolo_inicial] or ()
+        terminales = {self.simbolos[s] for s in self.prod_simbolos}
+        basura = [b for b in self.TOKENS_BASURA if b not in terminales] or ["ERROR"]
+        tokens = self._materializar(minima) + [self.rng.choice(basura)]
+        self._medir(fases, "mutar", t)
+        return tokens, "fallback"
+    
+    def generar_invalida(self):
+        """Genera cadena inválida por mutación sintáctica."""
+        tokens, tipo = self._generar_invalida_tokens(self.configuracion())
         return " ".join(tokens), tipo
     
+    def _generar_extrema_tokens(self, cfg):
+        """Construye directamente los tokens de un caso límite de la configuración.
+        
+        "profundidad": prof_max niveles de anidamiento (los que quepan en long_max);
+        "operadores": la cadena de operadores más larga dentro de long_max;
+        "longitud": exactamente long_max tokens (o la mayor longitud alcanzable),
+        muestreada uniformemente con la tabla de conteo. Si la gramática no
+        anida, no tiene operadores o el caso no cabe en long_max se recurre a "longitud".
+        """
+        criterio = self.rng.choice(self.CRITERIOS_EXTREMOS)
+        constructor = self.constructor_extremos()
+        ids = None
+        if criterio == "profundidad":
+            construido = constructor.anidamiento(cfg.prof_max, cfg.long_max, self.rng)
+            ids = construido[0] if construido else None
+        elif criterio == "operadores":
+            ids = constructor.cadena_operadores(cfg.long_max, self.rng)
+        if ids is None:
+            criterio = "longitud"
+            ids = self._extremo_longitud(cfg)
+        return self._materializar(ids), criterio
+    
+    def _extremo_longitud(self, cfg):
+        """IDs de una cadena de long_max tokens (o la mayor longitud alcanzable).
+        
+        Si no se puede muestrear con la tabla de conteo se recurre a la
+        derivación truncada.
+        """
+        ids = self._muestreo_conteo(cfg, lambda tabla: max(tabla.longitudes(self.simbolo_inicial)))
+        if ids is None:
+            ids = self._derivar_ids(self.simbolo_inicial, cfg.prof_max)[:cfg.long_max]
+        return ids
+    
+    def _longitud_al_azar(self, tabla):
+        """Longitud elegida al azar entre las alcanzables (ver TablaConteo.elegir_longitud)."""
+        return tabla.elegir_longitud(self.simbolo_inicial, self.rng)
+    
+    def _muestreo_conteo(self, cfg, elegir_longitud, spans=None):
+        """IDs de una derivación del símbolo inicial muestreada con la tabla de conteo, o None.
+        
+        La longitud la da elegir_longitud(tabla). Retorna None si la tabla no se
+        puede construir (infinitas derivaciones por un ciclo unitario o vacío) o
+        no hay derivaciones dentro de long_max; el fallo se recuerda por long_max
+        y quien llama recurre a la derivación truncada.
+        """
+        if self._long_max_sin_conteo == cfg.long_max:
+            return None
+        try:
+            tabla = self.tabla_conteo(cfg.long_max)
+            return tabla.muestrear(self.simbolo_inicial, elegir_longitud(tabla), self.rng, spans)
+        except ValueError:
+            self._long_max_sin_conteo = cfg.long_max
+            return None
+    
     def generar_extrema(self):
-        """Genera caso extremo con profundidad o longitud agresiva."""
-        criterio = random.choice(["profundidad", "longitud"])
-        self.config["prof_max"] = 20 if criterio == "profundidad" else 15
-        cadena = self.generar_valida()
-        self.config["prof_max"] = 5  # Restaurar
-        return cadena, criterio
+        """Genera un caso límite (anidamiento, longitud u operadores máximos)."""
+        tokens, criterio = self._generar_extrema_tokens(self.configuracion())
+        return " ".join(tokens), criterio
     
-    def analizar_cadena(self, cadena):
-        """Extrae métricas de una cadena generada."""
-        tokens = cadena.split()
-        operadores = {op: tokens.count(op) for op in ["+", "-", "*", "/"]}
+    def _analizar_tokens(self, tokens):
+        """Recorre los tokens una sola vez y extrae todas las métricas.
+        
+        Retorna (longitud, profundidad, operadores, parentesis_balanceados,
+        contiene_tokens_invalidos), con operadores en el orden de OPERADORES.
+        """
+        codigos, basura = self._CODIGOS_ANALISIS, self._BASURA
+        operadores = [0, 0, 0, 0]
+        prof_max = prof_actual = balance = 0
+        tiene_basura = False
         
-        prof_max = prof_actual = 0
         for t in tokens:
-            if t == "(":
-                prof_actual += 1
-                prof_max = max(prof_max, prof_actual)
-            elif t == ")":
-                prof_actual -= 1
+            c = codigos.get(t)
+            if c is not None:
+                if c < 4:
+                    operadores[c] += 1
+                elif c == 4:
+                    prof_actual += 1
+                    balance += 1
+                    if prof_actual > prof_max:
+                        prof_max = prof_actual
+                else:
+                    prof_actual -= 1
+                    balance -= 1
+            if not tiene_basura and t in basura:
+                tiene_basura = True
         
-        return {
-            "longitud_tokens": len(tokens),
-            "profundidad_estimada": prof_max,
-            "conteo_operadores": operadores,
-            "nivel_anidamiento": prof_max
-        }
+        return len(tokens), prof_max, operadores, balance == 0, tiene_basura
+    
+    def analizar_cadena(self, cadena):
+        """Extrae métricas de una cadena generada."""
+        return metricas(self._analizar_tokens(cadena.split()))
     
     def clasificar_automatico(self, cadena, tipo_generado):
         """Clasifica automáticamente una cadena generada."""
-        metricas = self.analizar_cadena(cadena)
         tokens = cadena.split()
         
-        # Validación básica de estructura
-        parentesis_balance = tokens.count("(") == tokens.count(")")
-        tiene_tokens_invalidos = any(t in self.TOKENS_BASURA for t in tokens)
+        # Validación básica de estructura y veredicto real de pertenencia al lenguaje
+        analisis = self._analizar_tokens(tokens)
+        veredicto = self.reconocedor().reconocer(tokens)
+        return clasificacion(analisis, tipo_generado, veredicto)
+    
+    def analizar_lote(self, cadenas, tipos):
+        """Analiza y clasifica muchos casos de una vez.
         
-        clasificacion = {
-            "tipo_declarado": tipo_generado,
-            "parentesis_balanceados": parentesis_balance,
-            "contiene_tokens_invalidos": tiene_tokens_invalidos,
-            "es_extremo": metricas["longitud_tokens"] > 30 or metricas["profundidad_estimada"] > 10
-        }
+        `cadenas` puede contener str o listas de tokens. Retorna una lista de
+        pares (metricas, clasificacion) en el mismo orden.
+        """
+        lotes = [c.split() if isinstance(c, str) else c for c in cadenas]
+        veredictos = self.reconocedor().verificar(lotes)
+        resultado = []
+        for tokens, tipo, veredicto in zip(lotes, tipos, veredictos):
+            analisis = self._analizar_tokens(tokens)
+            resultado.append((metricas(analisis), clasificacion(analisis, tipo, veredicto)))
+        return resultado
+    
+    def agregar_gancho(self, gancho):
+        """Registra gancho(fase, duracion_ns, tipo), llamado al terminar cada fase de cada caso.
+        
+        Las fases son las de AcumuladorReporte.FASES. Los ganchos corren en el
+        hilo que genera y no se propagan a los procesos de generar_casos_paralelo.
+        """
+        self.ganchos.append(gancho)
+    
+    def quitar_gancho(self, gancho):
+        self.ganchos.remove(gancho)
+    
+    def perfilar_proxima(self, modo="cprofile", archivo=None):
+        """Perfila sólo la próxima generación con cProfile o por muestreo.
+        
+        El resumen queda en `perfil` y en el reporte; con cProfile, `archivo`
+        recibe además las estadísticas completas en formato pstats.
+        """
+        self._perfil_pendiente = (PerfilEjecucion(modo), archivo)
+    
+    @staticmethod
+    def _medir(fases, fase, inicio_ns):
+        """Suma a fases[fase] el tiempo desde inicio_ns (si `fases` no es None); retorna el instante actual."""
+        ahora = time.perf_counter_ns()
+        if fases is not None:
+            fases[fase] = fases.get(fase, 0) + ahora - inicio_ns
+        return ahora
+    
+    def _registrar_fase(self, fase, inicio_ns, tipo):
+        """Acumula la duración de una fase desde inicio_ns y avisa a los ganchos."""
+        duracion = time.perf_counter_ns() - inicio_ns
+        self.acumulador.agregar_fase(fase, duracion)
+        for gancho in self.ganchos:
+            gancho(fase, duracion, tipo)
+    
+    def sembrar(self, semilla):
+        """Usa un generador aleatorio propio inicializado con `semilla`."""
+        self.rng = random.Random(semilla)
+    
+    def iter_casos(self, cantidad, id_inicial=1):
+        """Genera los casos uno a uno, como dicts, sin retenerlos en memoria."""
+        registros = self.iter_registros(cantidad, id_inicial)
+        try:
+            for registro in registros:
+                yield materializar_caso(*registro)
+        finally:
+            registros.close()
+    
+    def estadisticas_deduplicacion(self):
+        """Contadores del filtro de duplicados de la última generación ({} si no se usó)."""
+        if self.filtro_duplicados is None:
+            return self.deduplicacion
+        return dict(self.filtro_duplicados.estadisticas(), repetidos_emitidos=self.repetidos_emitidos)
+    
+    def _generar_tokens(self, tipo, cfg, fases=None):
+        """Genera los tokens y el detalle de un caso del tipo indicado.
         
-        return clasificacion
+        `fases` sólo se usa con casos inválidos (ver generar_mutantes).
+        """
+        if tipo == "valida":
+            return self._generar_valida_tokens(cfg), "derivacion_directa"
+        if tipo == "invalida":
+            return self._generar_invalida_tokens(cfg, fases)
+        return self._generar_extrema_tokens(cfg)
+    
+    def iter_registros(self, cantidad, id_inicial=1):
+        """Genera los casos uno a uno como tuplas (id, tipo, tokens, detalle, analisis, veredicto).
+        
+        Es la forma que recibe AlmacenCasos.agregar, sin armar dicts. Las
+        estadísticas del reporte se acumulan a medida que se producen casos.
+        """
+        self.acumulador = AcumuladorReporte()
+        self.estadisticas = self.acumulador.por_tipo
+        self.tiempo_inicio = time.time()
+        self.tiempo_fin = None
+        self._por_hilo.mutantes = []
+        cfg = self.configuracion()
+        if self.pool_subarboles is not None:
+            self.pool_subarboles.reiniciar_estadisticas()
+        if cfg.cobertura_k > 0:
+            self._cobertura(cfg.cobertura_k).reiniciar()
+        else:
+            self.cobertura = None
+        filtro = FiltroBloom(cfg.capacidad_dedup) if cfg.deduplicar else None
+        self.filtro_duplicados, self.deduplicacion, self.repetidos_emitidos = filtro, {}, 0
+        reconocer = self.reconocedor().reconocer
+        
+        perfil, archivo_perfil = self._perfil_pendiente or (None, None)
+        self._perfil_pendiente = None
+        self.perfil = None
+        if perfil:
+            perfil.iniciar()
+        
+        # El cierre anticipado del generador (p. ej. al cancelar) también marca el fin
+        try:
+            for i in range(id_inicial - 1, id_inicial - 1 + cantidad):
+                t0 = time.perf_counter_ns()
+                r = self.rng.random() * 100
+                
+                # Determinar tipo y generar
+                if r < cfg.dist_valida:
+                    tipo = "valida"
+                elif r < cfg.dist_valida + cfg.dist_invalida:
+                    tipo = "invalida"
+                else:
+                    tipo = "extrema"
+                # Los inválidos separan derivar la semilla, mutarla y filtrar los mutantes aceptados
+                medidas = {} if tipo == "invalida" else None
+                tokens, meta = self._generar_tokens(tipo, cfg, medidas)
+                
+                # Un caso repetido se regenera (del mismo tipo) hasta REINTENTOS_DUPLICADO veces
+                if filtro is not None:
+                    nuevo, intentos = filtro.agregar(tokens), 0
+                    while not nuevo and intentos < self.REINTENTOS_DUPLICADO:
+                        tokens, meta = self._generar_tokens(tipo, cfg, medidas)
+                        nuevo, intentos = filtro.agregar(tokens), intentos + 1
+                    if not nuevo:
+                        self.repetidos_emitidos += 1
+                t1 = time.perf_counter_ns()
+                
+                # Un único análisis sobre los tokens ya generados
+                analisis = self._analizar_tokens(tokens)
+                t2 = time.perf_counter_ns()
+                veredicto = reconocer(tokens)
+                t3 = time.perf_counter_ns()
+                
+                if medidas is None:
+                    medidas = {"derivar": t1 - t0}
+                clasificar = medidas.pop("clasificar", 0) + t3 - t2
+                fases = tuple(medidas.items()) + (("analizar", t2 - t1), ("clasificar", clasificar))
+                for gancho in self.ganchos:
+                    for nombre, duracion in fases:
+                        gancho(nombre, duracion, tipo)
+                self.acumulador.agregar(tipo, meta, analisis, (t1 - t0) / 1e9, fases)
+                yield i + 1, tipo, tokens, meta, analisis, veredicto
+        finally:
+            self.tiempo_fin = time.time()
+            if perfil:
+                perfil.detener()
+                self.perfil = perfil.resumen()
+                if archivo_perfil:
+                    perfil.guardar(archivo_perfil)
     
     def generar_casos(self, cantidad):
-        """Genera todos los casos según configuración."""
-        self.resultados = []
-        self.estadisticas = {"valida": 0, "invalida": 0, "extrema": 0}
-        self.tiempos_por_tipo = {"valida": [], "invalida": [], "extrema": []}
+        """Genera todos los casos según configuración en un AlmacenCasos."""
+        self.resultados = _almacenar(self.iter_registros(cantidad))
+    
+    def generar_casos_paralelo(self, cantidad, workers, semilla):
+        """Genera casos repartidos en `workers` procesos.
+        
+        Cada shard usa su propio generador aleatorio derivado de (semilla, índice),
+        por lo que el resultado es reproducible para un mismo par (semilla, workers).
+        Los casos se reúnen en orden de id y las estadísticas de los shards se combinan.
+        La cobertura se une entre shards, pero cada shard descarta duplicados
+        sólo entre sus propios casos.
+        """
+        base, resto = divmod(cantidad, workers)
+        tareas, id_inicial = [], 1
+        for indice in range(workers):
+            tam = base + (1 if indice < resto else 0)
+            tareas.append((self.gramatica, dict(self.config), semilla_shard(semilla, indice), tam, id_inicial))
+            id_inicial += tam
+        
         self.tiempo_inicio = time.time()
+        if workers == 1:
+            shards = [_generar_shard(*tareas[0])]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                shards = list(executor.map(_generar_shard, *zip(*tareas)))
         
-        for i in range(cantidad):
-            inicio = time.time()
-            r = random.random() * 100
-            dist_v = self.config["dist_valida"]
-            dist_i = self.config["dist_invalida"]
-            
-            # Determinar tipo y generar
-            if r < dist_v:
-                tipo, cadena, meta = "valida", self.generar_valida(), "derivacion_directa"
-            elif r < dist_v + dist_i:
-                tipo = "invalida"
-                cadena, meta = self.generar_invalida()
-            else:
-                tipo = "extrema"
-                cadena, meta = self.generar_extrema()
-            
-            tiempo = time.time() - inicio
-            self.tiempos_por_tipo[tipo].append(tiempo)
-            self.estadisticas[tipo] += 1
-            
-            caso = {
-                "id": i + 1,
-                "tipo": tipo,
-                "cadena": cadena,
-                "detalle_generacion": meta,
-                "metricas": self.analizar_cadena(cadena),
-                "clasificacion": self.clasificar_automatico(cadena, tipo)
-            }
-            self.resultados.append(caso)
-    
-    def configurar(self, prof_max=5, long_max=50, dist_valida=50, dist_invalida=30):
-        """Configura parámetros de generación."""
+        self.resultados, self.acumulador = AlmacenCasos(), AcumuladorReporte()
+        self.pool_subarboles = self.cobertura = self.filtro_duplicados = None
+        self.deduplicacion = {}
+        for casos, acumulador, pool, cobertura, deduplicacion in shards:
+            self.resultados.extender(casos)
+            self.acumulador.combinar(acumulador)
+            if pool:
+                self._pool(self.config["capacidad_pool"]).combinar_estadisticas(pool)
+            if cobertura:
+                self._cobertura(cobertura.k).combinar(cobertura)
+            for clave in ("elementos", "duplicados", "memoria_bytes", "repetidos_emitidos"):
+                if clave in deduplicacion:
+                    self.deduplicacion[clave] = self.deduplicacion.get(clave, 0) + deduplicacion[clave]
+        self.estadisticas = self.acumulador.por_tipo
+        self.tiempo_fin = time.time()
+    
+    def configurar(self, prof_max=5, long_max=50, dist_valida=50, dist_invalida=30,
+                   muestreo="truncamiento", mutantes_por_semilla=1, reuso_subarboles=0.0,
+                   capacidad_pool=200000, cobertura_k=0, guia_cobertura=1.0, deduplicar=False,
+                   capacidad_dedup=10000000):
+        """Configura parámetros de generación.
+        
+        muestreo="conteo" genera las cadenas válidas con longitud uniforme en
+        [1, long_max] a partir de la tabla de conteo, en lugar de truncar; si la
+        gramática tiene un ciclo unitario o vacío (infinitas derivaciones de una
+        misma longitud) se vuelve a la derivación truncada.
+        mutantes_por_semilla fija cuántos casos inválidos salen de cada derivación.
+        reuso_subarboles (0..1) activa el pool de subárboles en las derivaciones,
+        acotado a capacidad_pool tokens.
+        cobertura_k > 0 registra la cobertura de producciones y de k-caminos en
+        las derivaciones (muestreo por truncamiento) y, con probabilidad
+        guia_cobertura, elige lo que falta cubrir. deduplicar descarta cadenas
+        repetidas con un filtro de Bloom dimensionado para capacidad_dedup casos.
+        """
         self.config.update({
             "prof_max": prof_max,
             "long_max": long_max,
             "dist_valida": dist_valida,
-            "dist_invalida": dist_invalida
+            "dist_invalida": dist_invalida,
+            "muestreo": muestreo,
+            "mutantes_por_semilla": mutantes_por_semilla,
+            "reuso_subarboles": reuso_subarboles,
+            "capacidad_pool": capacidad_pool,
+            "cobertura_k": cobertura_k,
+            "guia_cobertura": guia_cobertura,
+            "deduplicar": deduplicar,
+            "capacidad_dedup": capacidad_dedup
         })
     
     def exportar_json(self, nombre_archivo):
-        """Exporta casos a JSON."""
+        """Exporta casos a JSON.
+        
+        Los casos se materializan y escriben de a uno, con el mismo formato que
+        json.dump(lista, indent=4).
+        """
         with open(nombre_archivo, "w", encoding='utf-8') as f:
-            json.dump(self.resultados, f, indent=4, ensure_ascii=False)
+            if not self.resultados:
+                f.write("[]")
+                return
+            separador = "[\n"
+            for caso in self.resultados:
+                inicio = time.perf_counter_ns()
+                texto = json.dumps(caso, indent=4, ensure_ascii=False)
+                f.write(separador + "    " + texto.replace("\n", "\n    "))
+                separador = ",\n"
+                self._registrar_fase("exportar", inicio, caso["tipo"])
+            f.write("\n]")
     
-    def generar_reporte(self):
-        """Genera reporte estadístico completo."""
-        if not self.resultados:
-            return {}
-        
-        total = len(self.resultados)
-        tiempo_total = time.time() - self.tiempo_inicio
-        
-        longitudes = [r["metricas"]["longitud_tokens"] for r in self.resultados]
-        profundidades = [r["metricas"]["profundidad_estimada"] for r in self.resultados]
+    def guardar_resultados(self, nombre_archivo):
+        """Guarda los resultados en el formato binario de AlmacenCasos."""
+        self.resultados.guardar(nombre_archivo)
+    
+    def cargar_resultados(self, nombre_archivo):
+        """Carga resultados guardados con guardar_resultados, mapeados en memoria."""
+        self.resultados = AlmacenCasos.cargar(nombre_archivo)
+    
+    def _exportar_flujo(self, nombre_archivo, formatear, cantidad, tam_bloque):
+        """Escribe casos línea a línea, vaciando el buffer cada tam_bloque casos.
         
-        operadores_total = {op: 0 for op in ["+", "-", "*", "/"]}
-        mutaciones_por_tipo = {}
+        Si cantidad es None se exportan los resultados ya generados; si no, los
+        casos se generan y escriben sobre la marcha con memoria constante.
+        """
+        casos = self.resultados if cantidad is None else self.iter_casos(cantidad)
+        with open(nombre_archivo, "w", encoding='utf-8') as f:
+            bloque = []
+            for caso in casos:
+                inicio = time.perf_counter_ns()
+                bloque.append(formatear(caso))
+                if len(bloque) >= tam_bloque:
+                    f.write("".join(bloque))
+                    bloque.clear()
+                self._registrar_fase("exportar", inicio, caso["tipo"])
+            f.write("".join(bloque))
+    
+    def exportar_ndjson(self, nombre_archivo, cantidad=None, tam_bloque=1000):
+        """Exporta casos en formato JSON Lines (un objeto JSON por línea)."""
+        self._exportar_flujo(
+            nombre_archivo,
+            lambda caso: json.dumps(caso, ensure_ascii=False) + "\n",
+            cantidad, tam_bloque
+        )
+    
+    def exportar_txt(self, nombre_archivo, cantidad=None, tam_bloque=1000):
+        """Exporta casos en texto plano: id, tipo y cadena separados por tabulación."""
+        self._exportar_flujo(
+            nombre_archivo,
+            lambda caso: f"{caso['id']}\t{caso['tipo']}\t{caso['cadena']}\n",
+            cantidad, tam_bloque
+        )
+    
+    def generar_reporte(self):
+        """Genera reporte estadístico completo.
         
-        for r in self.resultados:
-            for op, count in r["metricas"]["conteo_operadores"].items():
-                operadores_total[op] += count
-            
-            if r["tipo"] == "invalida" and r["detalle_generacion"] != "N/A":
-                tipo_mut = r["detalle_generacion"]
-                mutaciones_por_tipo[tipo_mut] = mutaciones_por_tipo.get(tipo_mut, 0) + 1
+        Se arma desde los acumuladores, así que su costo no depende del número
+        de casos y puede pedirse mientras la generación sigue en curso.
+        """
+        acc = self.acumulador.instantanea()
+        if not acc["total"]:
+            return {}
         
-        tiempos_prom = {t: (sum(ts)/len(ts) if ts else 0) for t, ts in self.tiempos_por_tipo.items()}
+        total = acc["total"]
+        tiempo_total = (self.tiempo_fin or time.time()) - self.tiempo_inicio
         
         return {
             "fecha_generacion": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
             "total_casos": total,
             "distribucion_porcentual": {
-                f"{k}s": f"{(v/total)*100:.2f}%" for k, v in self.estadisticas.items()
+                f"{k}s": f"{(v/total)*100:.2f}%" for k, v in acc["por_tipo"].items()
             },
-            "distribucion_numerica": self.estadisticas,
-            "longitud_promedio_tokens": sum(longitudes) / total,
-            "longitud_maxima_tokens": max(longitudes),
-            "profundidad_maxima_arbol": max(profundidades),
-            "profundidad_promedio_arbol": sum(profundidades) / total,
-            "nivel_anidamiento_promedio": sum(r["metricas"]["nivel_anidamiento"] for r in self.resultados) / total,
-            "operadores_generados_total": operadores_total,
-            "mutaciones_aplicadas": mutaciones_por_tipo,
+            "distribucion_numerica": acc["por_tipo"],
+            "longitud_promedio_tokens": acc["longitud_promedio"],
+            "longitud_desviacion_tokens": acc["longitud_desviacion"],
+            "longitud_minima_tokens": acc["longitud_minima"],
+            "longitud_maxima_tokens": acc["longitud_maxima"],
+            "histograma_longitud_tokens": acc["histograma_longitud"],
+            "profundidad_maxima_arbol": acc["profundidad_maxima"],
+            "profundidad_promedio_arbol": acc["profundidad_promedio"],
+            "profundidad_desviacion_arbol": acc["profundidad_desviacion"],
+            "histograma_profundidad_arbol": acc["histograma_profundidad"],
+            "nivel_anidamiento_promedio": acc["profundidad_promedio"],
+            "operadores_generados_total": acc["operadores"],
+            "mutaciones_aplicadas": acc["mutaciones"],
             "tiempo_ejecucion_total_segundos": round(tiempo_total, 4),
-            "tiempo_promedio_por_tipo_segundos": {k: round(v, 4) for k, v in tiempos_prom.items()},
+            "tiempo_promedio_por_tipo_segundos": {k: round(v, 4) for k, v in acc["tiempo_promedio_por_tipo"].items()},
+            "tiempo_cuantiles_por_tipo_segundos": {
+                tipo: {q: round(v, 6) for q, v in cuantiles.items()}
+                for tipo, cuantiles in acc["tiempo_cuantiles_por_tipo"].items()
+            },
+            "tiempo_fases_segundos": {
+                fase: {k: round(v, 9) if isinstance(v, float) else v for k, v in datos.items()}
+                for fase, datos in acc["fases"].items()
+            },
+            "perfil": self.perfil or {},
+            "pool_subarboles": self.pool_subarboles.estadisticas() if self.pool_subarboles else {},
+            "cobertura": self.cobertura.estadisticas() if self.cobertura else {},
+            "deduplicacion": self.estadisticas_deduplicacion(),
             "configuracion_usada": self.config
         }
     
@@ -247,11 +1191,22 @@ class GeneradorCasosPrueba:
             
             f.write("\nMÉTRICAS\n" + "-"*70 + "\n")
             f.write(f"  Longitud promedio: {reporte['longitud_promedio_tokens']:.2f} tokens\n")
+            f.write(f"  Desviación longitud: {reporte['longitud_desviacion_tokens']:.2f} tokens\n")
+            f.write(f"  Longitud mínima: {reporte['longitud_minima_tokens']} tokens\n")
             f.write(f"  Longitud máxima: {reporte['longitud_maxima_tokens']} tokens\n")
             f.write(f"  Profundidad máxima: {reporte['profundidad_maxima_arbol']}\n")
             f.write(f"  Profundidad promedio: {reporte['profundidad_promedio_arbol']:.2f}\n")
+            f.write(f"  Desviación profundidad: {reporte['profundidad_desviacion_arbol']:.2f}\n")
             f.write(f"  Nivel anidamiento promedio: {reporte['nivel_anidamiento_promedio']:.2f}\n")
             
+            f.write("\nHISTOGRAMA DE LONGITUD (tokens)\n" + "-"*70 + "\n")
+            for rango, count in reporte['histograma_longitud_tokens'].items():
+                f.write(f"  {rango:>8}: {count}\n")
+            
+            f.write("\nHISTOGRAMA DE PROFUNDIDAD\n" + "-"*70 + "\n")
+            for rango, count in reporte['histograma_profundidad_arbol'].items():
+                f.write(f"  {rango:>8}: {count}\n")
+            
             f.write("\nOPERADORES\n" + "-"*70 + "\n")
             for op, count in reporte['operadores_generados_total'].items():
                 f.write(f"  {op}: {count}\n")
@@ -264,10 +1219,376 @@ class GeneradorCasosPrueba:
             f.write("\nTIEMPOS\n" + "-"*70 + "\n")
             f.write(f"  Total: {reporte['tiempo_ejecucion_total_segundos']}s\n")
             for tipo, tiempo in reporte['tiempo_promedio_por_tipo_segundos'].items():
-                f.write(f"  {tipo}: {tiempo}s\n")
+                cuantiles = reporte['tiempo_cuantiles_por_tipo_segundos'][tipo]
+                detalle = ", ".join(f"{q}={v}s" for q, v in cuantiles.items())
+                f.write(f"  {tipo}: {tiempo}s ({detalle})\n")
+            
+            if reporte['tiempo_fases_segundos']:
+                f.write("\nTIEMPOS POR FASE (µs por caso)\n" + "-"*70 + "\n")
+                f.write(f"  {'fase':<12}{'casos':>10}{'media':>12}{'p50':>12}{'p90':>12}{'p99':>12}\n")
+                for fase, datos in reporte['tiempo_fases_segundos'].items():
+                    columnas = "".join(f"{datos[k]*1e6:>12.2f}" for k in ("media", "p50", "p90", "p99"))
+                    f.write(f"  {fase:<12}{datos['n']:>10}{columnas}\n")
+            
+            if reporte['perfil']:
+                perfil = reporte['perfil']
+                f.write(f"\nPERFIL ({perfil['modo']})\n" + "-"*70 + "\n")
+                for fila in perfil['funciones']:
+                    if perfil['modo'] == "muestreo":
+                        f.write(f"  {fila['porcentaje']:>6.2f}%  {fila['funcion']}\n")
+                    else:
+                        f.write(f"  {fila['tiempo_propio_segundos']:>10.4f}s {fila['llamadas']:>9}  {fila['funcion']}\n")
+            
+            if reporte['pool_subarboles']:
+                pool = reporte['pool_subarboles']
+                f.write("\nPOOL DE SUBÁRBOLES\n" + "-"*70 + "\n")
+                f.write(f"  Tasa de aciertos: {pool['tasa_aciertos']*100:.2f}% "
+                        f"({pool['aciertos']} aciertos, {pool['fallos']} fallos)\n")
+                f.write(f"  Memoria: {pool['memoria_bytes']} bytes en {pool['tokens']} tokens, "
+                        f"{pool['claves']} claves, {pool['desalojos']} desalojos\n")
+            
+            if reporte['cobertura']:
+                cobertura = reporte['cobertura']
+                f.write("\nCOBERTURA\n" + "-"*70 + "\n")
+                f.write(f"  Producciones: {cobertura['porcentaje_producciones']:.2f}% "
+                        f"({cobertura['producciones_cubiertas']}/{cobertura['producciones_total']})\n")
+                if "caminos_total" in cobertura:
+                    f.write(f"  {cobertura['k']}-caminos: {cobertura['porcentaje_caminos']:.2f}% "
+                            f"({cobertura['caminos_cubiertos']}/{cobertura['caminos_total']})\n")
+            
+            if reporte['deduplicacion']:
+                dedup = reporte['deduplicacion']
+                f.write("\nDUPLICADOS\n" + "-"*70 + "\n")
+                f.write(f"  Descartados: {dedup['duplicados'] - dedup['repetidos_emitidos']}, "
+                        f"emitidos igual tras {self.REINTENTOS_DUPLICADO} reintentos: {dedup['repetidos_emitidos']}\n")
+                f.write(f"  Filtro: {dedup['elementos']} cadenas en {dedup['memoria_bytes']} bytes\n")
             
             f.write("\nCONFIGURACIÓN\n" + "-"*70 + "\n")
             for k, v in reporte['configuracion_usada'].items():
                 f.write(f"  {k}: {v}\n")
             
-            f.write("\n" + "="*70 + "\n")
\ No newline at end of file
+            f.write("\n" + "="*70 + "\n")
+
+
+def semilla_shard(semilla, indice):
+    """Deriva la semilla independiente del shard `indice` a partir de la semilla base."""
+    digest = hashlib.sha256(f"{semilla}:{indice}".encode()).digest()
+    return int.from_bytes(digest[:8], "big")
+
+
+def _almacenar(registros):
+    """Vuelca los registros de iter_registros en un AlmacenCasos nuevo."""
+    almacen = AlmacenCasos()
+    for registro in registros:
+        almacen.agregar(*registro)
+    return almacen
+
+
+def _generar_shard(gramatica, config, semilla, cantidad, id_inicial):
+    """Genera un shard de casos en un proceso trabajador."""
+    generador = GeneradorCasosPrueba()
+    generador.gramatica = gramatica
+    generador._compilar_gramatica()
+    generador.config.update(config)
+    generador.sembrar(semilla)
+    casos = _almacenar(generador.iter_registros(cantidad, id_inicial))
+    pool = generador.pool_subarboles.estadisticas() if generador.pool_subarboles else None
+    return casos, generador.acumulador, pool, generador.cobertura, generador.estadisticas_deduplicacion()
+
+
+DIR_GRAMATICAS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "gramaticas")
+GRAMATICAS_BENCH = ["pequena.txt", "mediana.txt", "grande.txt"]
+# Distribución (dist_valida, dist_invalida) que fuerza cada tipo de caso
+DISTRIBUCION_POR_TIPO = {"valida": (100, 0), "invalida": (0, 100), "extrema": (0, 0)}
+
+
+def _agregar_opciones_config(parser):
+    """Opciones comunes que corresponden a los parámetros de `configurar`."""
+    parser.add_argument("--prof-max", type=int, default=5, help="profundidad máxima de derivación")
+    parser.add_argument("--long-max", type=int, default=50, help="longitud máxima en tokens")
+    parser.add_argument("--muestreo", choices=["truncamiento", "conteo"], default="truncamiento")
+    parser.add_argument("--mutantes-por-semilla", type=int, default=1,
+                        help="casos inválidos producidos por cada derivación")
+    parser.add_argument("--reuso-subarboles", type=float, default=0.0,
+                        help="probabilidad de reutilizar subárboles al derivar (0 = desactivado)")
+    parser.add_argument("--capacidad-pool", type=int, default=200000, help="tokens máximos en el pool")
+    parser.add_argument("--cobertura-k", type=int, default=0,
+                        help="registra la cobertura de k-caminos de producciones (0 = desactivado)")
+    parser.add_argument("--guia-cobertura", type=float, default=1.0,
+                        help="probabilidad de elegir producciones o caminos aún no cubiertos")
+    parser.add_argument("--deduplicar", action="store_true", help="descarta cadenas repetidas (filtro de Bloom)")
+    parser.add_argument("--capacidad-dedup", type=int, default=10000000,
+                        help="casos para los que se dimensiona el filtro de duplicados")
+    parser.add_argument("--semilla", type=int, default=None, help="semilla para resultados reproducibles")
+    parser.add_argument("--cantidad", type=int, default=1000, help="número de casos")
+
+
+def _cargar_generador(ruta):
+    """Generador con la gramática de `ruta`, o None si no se pudo cargar.
+    
+    Los errores y las advertencias del análisis de la gramática van a stderr.
+    """
+    generador = GeneradorCasosPrueba()
+    if not generador.cargar_gramatica(ruta):
+        print(f"Error: no se pudo cargar la gramática {ruta}", file=sys.stderr)
+        return None
+    for advertencia in generador.advertencias_gramatica():
+        print(f"Advertencia: {advertencia}", file=sys.stderr)
+    return generador
+
+
+def _comando_generar(args):
+    generador = _cargar_generador(args.gramatica)
+    if generador is None:
+        return 1
+    generador.configurar(args.prof_max, args.long_max, args.dist_valida, args.dist_invalida, args.muestreo,
+                         args.mutantes_por_semilla, args.reuso_subarboles, args.capacidad_pool,
+                         args.cobertura_k, args.guia_cobertura, args.deduplicar, args.capacidad_dedup)
+    
+    if args.workers > 1:
+        generador.generar_casos_paralelo(args.cantidad, args.workers, args.semilla or 0)
+        cantidad = None
+    else:
+        if args.semilla is not None:
+            generador.sembrar(args.semilla)
+        if args.perfil:
+            generador.perfilar_proxima(args.perfil, args.perfil_salida)
+        # NDJSON y TXT se escriben en flujo, sin retener los casos
+        cantidad = args.cantidad
+        if args.formato in ("json", "bin"):
+            generador.generar_casos(cantidad)
+            cantidad = None
+    
+    if args.formato == "json":
+        generador.exportar_json(args.salida)
+    elif args.formato == "bin":
+        generador.guardar_resultados(args.salida)
+    elif args.formato == "ndjson":
+        generador.exportar_ndjson(args.salida, cantidad)
+    else:
+        generador.exportar_txt(args.salida, cantidad)
+    
+    if args.reporte:
+        generador.exportar_reporte_txt(args.reporte)
+    reporte = generador.generar_reporte()
+    print(f"{reporte.get('total_casos', 0)} casos en {reporte.get('tiempo_ejecucion_total_segundos', 0)}s -> {args.salida}",
+          file=sys.stderr)
+    return 0
+
+
+def _medir_gramatica(ruta, args):
+    """Mide casos/s y tiempos por tipo de caso para una gramática."""
+    generador = GeneradorCasosPrueba()
+    if not generador.cargar_gramatica(ruta):
+        raise ValueError(f"No se pudo cargar la gramática {ruta}")
+    
+    resultado = {
+        "producciones": len(generador.prod_lhs),
+        "no_terminales": generador.num_no_terminales,
+        "reconocedor": generador.reconocedor().modo,
+        "por_tipo": {}
+    }
+    for tipo, (dist_v, dist_i) in DISTRIBUCION_POR_TIPO.items():
+        generador.configurar(args.prof_max, args.long_max, dist_v, dist_i, args.muestreo,
+                            args.mutantes_por_semilla, args.reuso_subarboles, args.capacidad_pool,
+                            args.cobertura_k, args.guia_cobertura, args.deduplicar, args.capacidad_dedup)
+        generador.sembrar(args.semilla)
+        inicio = time.perf_counter()
+        for _ in generador.iter_casos(args.cantidad):
+            pass
+        segundos = time.perf_counter() - inicio
+        
+        reporte = generador.generar_reporte()
+        generacion = generador.acumulador.tiempos[tipo].suma
+        resultado["por_tipo"][tipo] = {
+            "casos_por_segundo": args.cantidad / segundos,
+            "segundos_total": segundos,
+            "segundos_generacion": generacion,
+            "segundos_analisis": max(segundos - generacion, 0.0),
+            "tiempo_cuantiles_segundos": reporte["tiempo_cuantiles_por_tipo_segundos"][tipo],
+            "longitud_promedio_tokens": reporte["longitud_promedio_tokens"]
+        }
+    return resultado
+
+
+def _comando_bench(args):
+    rutas = args.gramaticas or [os.path.join(DIR_GRAMATICAS, g) for g in GRAMATICAS_BENCH]
+    resultados = {
+        "fecha": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "python": platform.python_version(),
+        "parametros": {
+            "cantidad": args.cantidad, "prof_max": args.prof_max, "long_max": args.long_max,
+            "muestreo": args.muestreo, "mutantes_por_semilla": args.mutantes_por_semilla,
+            "reuso_subarboles": args.reuso_subarboles,
+            "semilla": args.semilla
+        },
+        "gramaticas": {}
+    }
+    anterior = None
+    if args.comparar:
+        with open(args.comparar, encoding='utf-8') as f:
+            anterior = json.load(f)["gramaticas"]
+    
+    print(f"{'gramática':<14}{'tipo':<10}{'casos/s':>12}{'gen (s)':>10}{'análisis (s)':>14}{'vs anterior':>13}")
+    for ruta in rutas:
+        nombre = os.path.splitext(os.path.basename(ruta))[0]
+        medicion = _medir_gramatica(ruta, args)
+        resultados["gramaticas"][nombre] = medicion
+        for tipo, m in medicion["por_tipo"].items():
+            cambio = ""
+            previo = (anterior or {}).get(nombre, {}).get("por_tipo", {}).get(tipo)
+            if previo:
+                cambio = f"{(m['casos_por_segundo'] / previo['casos_por_segundo'] - 1) * 100:+.1f}%"
+            print(f"{nombre:<14}{tipo:<10}{m['casos_por_segundo']:>12,.0f}"
+                  f"{m['segundos_generacion']:>10.3f}{m['segundos_analisis']:>14.3f}{cambio:>13}")
+    
+    if args.salida:
+        with open(args.salida, "w", encoding='utf-8') as f:
+            json.dump(resultados, f, indent=4, ensure_ascii=False)
+    return 0
+
+
+def _comando_ejecutar(args):
+    generador = _cargar_generador(args.gramatica)
+    if generador is None:
+        return 1
+    generador.configurar(args.prof_max, args.long_max, args.dist_valida, args.dist_invalida, args.muestreo,
+                         args.mutantes_por_semilla, args.reuso_subarboles, args.capacidad_pool,
+                         args.cobertura_k, args.guia_cobertura, args.deduplicar, args.capacidad_dedup)
+    if args.semilla is not None:
+        generador.sembrar(args.semilla)
+    
+    ejecutor = Ejecutor(shlex.split(args.objetivo), args.concurrencia, args.tam_lote, args.timeout)
+    resumen = ejecutor.ejecutar(generador.iter_casos(args.cantidad), args.discrepancias)
+    print(json.dumps(resumen, indent=4, ensure_ascii=False))
+    return 1 if resumen["discrepancias"] else 0
+
+
+def _comando_minimizar(args):
+    generador = _cargar_generador(args.gramatica)
+    if generador is None:
+        return 1
+    if args.cadena:
+        casos = [{"cadena": args.cadena}]
+    else:
+        with open(args.discrepancias, encoding='utf-8') as f:
+            casos = [json.loads(linea) for linea in f if linea.strip()]
+    
+    oraculo = oraculo_discrepancia(generador, shlex.split(args.objetivo), args.timeout)
+    minimizador = Minimizador(generador, oraculo, args.workers)
+    salida = open(args.salida, "w", encoding='utf-8') if args.salida else sys.stdout
+    try:
+        for caso in casos:
+            try:
+                resultado = dict(minimizador.minimizar(caso["cadena"]), id=caso.get("id"))
+            except ValueError as e:
+                resultado = {"id": caso.get("id"), "original": caso["cadena"], "error": str(e)}
+            salida.write(json.dumps(resultado, ensure_ascii=False) + "\n")
+    finally:
+        if salida is not sys.stdout:
+            salida.close()
+    return 0
+
+
+def _comando_enumerar(args):
+    generador = _cargar_generador(args.gramatica)
+    if generador is None:
+        return 1
+    if args.parte is not None:
+        if not 0 <= args.parte < args.partes:
+            print(f"Error: --parte debe estar entre 0 y {args.partes - 1}", file=sys.stderr)
+            return 1
+        desde, hasta = generador.rangos_enumeracion(args.partes, args.long_max)[args.parte]
+    else:
+        desde, hasta = args.desde, args.hasta
+    if args.total:
+        print(generador.total_enumeracion(args.long_max))
+        return 0
+    
+    salida = open(args.salida, "w", encoding='utf-8') if args.salida else sys.stdout
+    try:
+        for indice, cadena in generador.enumerar(args.long_max, desde, hasta):
+            salida.write(f"{indice}\t{cadena}\n")
+    finally:
+        if salida is not sys.stdout:
+            salida.close()
+    return 0
+
+
+def main(argv=None):
+    """Punto de entrada de línea de comandos (sin interfaz gráfica)."""
+    parser = argparse.ArgumentParser(
+        prog="python -m generador",
+        description="Generador automático de casos de prueba desde gramática libre de contexto."
+    )
+    subparsers = parser.add_subparsers(dest="comando", required=True)
+    
+    p_generar = subparsers.add_parser("generar", aliases=["generate"], help="genera casos y los exporta")
+    p_generar.add_argument("gramatica", help="archivo .txt con la gramática")
+    _agregar_opciones_config(p_generar)
+    p_generar.add_argument("--dist-valida", type=float, default=50, help="%% de casos válidos")
+    p_generar.add_argument("--dist-invalida", type=float, default=30, help="%% de casos inválidos")
+    p_generar.add_argument("--formato", choices=["json", "ndjson", "txt", "bin"], default="ndjson",
+                           help="bin: almacén columnar binario, recargable con cargar_resultados")
+    p_generar.add_argument("--salida", required=True, help="archivo de salida de los casos")
+    p_generar.add_argument("--reporte", help="archivo donde exportar el reporte TXT")
+    p_generar.add_argument("--workers", type=int, default=1, help="procesos en paralelo")
+    p_generar.add_argument("--perfil", choices=PerfilEjecucion.MODOS,
+                           help="perfila la generación (sólo con --workers 1); el resumen va al reporte")
+    p_generar.add_argument("--perfil-salida", help="archivo pstats con el perfil completo (modo cprofile)")
+    p_generar.set_defaults(funcion=_comando_generar)
+    
+    p_ejecutar = subparsers.add_parser("ejecutar", aliases=["run"],
+                                       help="ejecuta los casos contra un comando y reporta discrepancias")
+    p_ejecutar.add_argument("gramatica", help="archivo .txt con la gramática")
+    _agregar_opciones_config(p_ejecutar)
+    p_ejecutar.add_argument("--dist-valida", type=float, default=50, help="%% de casos válidos")
+    p_ejecutar.add_argument("--dist-invalida", type=float, default=30, help="%% de casos inválidos")
+    p_ejecutar.add_argument("--objetivo", required=True,
+                            help="comando que lee una cadena por línea y responde 1/0 por línea")
+    p_ejecutar.add_argument("--concurrencia", type=int, default=4, help="procesos del objetivo simultáneos")
+    p_ejecutar.add_argument("--tam-lote", type=int, default=100, help="casos por invocación del objetivo")
+    p_ejecutar.add_argument("--timeout", type=float, default=60.0, help="segundos máximos por lote")
+    p_ejecutar.add_argument("--discrepancias", default="discrepancias.ndjson",
+                            help="archivo NDJSON con las discrepancias")
+    p_ejecutar.set_defaults(funcion=_comando_ejecutar)
+    
+    p_minimizar = subparsers.add_parser("minimizar", aliases=["reduce"],
+                                        help="reduce casos que fallan a reproductores mínimos")
+    p_minimizar.add_argument("gramatica", help="archivo .txt con la gramática")
+    p_minimizar.add_argument("--objetivo", required=True, help="comando objetivo (mismo protocolo que ejecutar)")
+    origen = p_minimizar.add_mutually_exclusive_group(required=True)
+    origen.add_argument("--discrepancias", help="NDJSON de discrepancias producido por ejecutar")
+    origen.add_argument("--cadena", help="una cadena que falla")
+    p_minimizar.add_argument("--workers", type=int, default=4, help="llamadas al objetivo en paralelo")
+    p_minimizar.add_argument("--timeout", type=float, default=60.0, help="segundos máximos por llamada")
+    p_minimizar.add_argument("--salida", help="NDJSON con los resultados (por defecto stdout)")
+    p_minimizar.set_defaults(funcion=_comando_minimizar)
+    
+    p_enumerar = subparsers.add_parser("enumerar", aliases=["enumerate"],
+                                       help="enumera todas las cadenas hasta una longitud, por índice")
+    p_enumerar.add_argument("gramatica", help="archivo .txt con la gramática")
+    p_enumerar.add_argument("--long-max", type=int, required=True, help="longitud máxima en tokens")
+    p_enumerar.add_argument("--desde", type=int, default=0, help="primer índice (incluido)")
+    p_enumerar.add_argument("--hasta", type=int, help="último índice (excluido)")
+    p_enumerar.add_argument("--parte", type=int, help="recorre sólo la parte k (0..partes-1) de la enumeración")
+    p_enumerar.add_argument("--partes", type=int, default=1, help="cantidad de partes para --parte")
+    p_enumerar.add_argument("--total", action="store_true", help="sólo imprime la cantidad de cadenas")
+    p_enumerar.add_argument("--salida", help="archivo con una línea \"indice<TAB>cadena\" por caso")
+    p_enumerar.set_defaults(funcion=_comando_enumerar)
+    
+    p_bench = subparsers.add_parser("bench", help="mide el rendimiento sobre gramáticas de referencia")
+    p_bench.add_argument("gramaticas", nargs="*", help="gramáticas a medir (por defecto las de gramaticas/)")
+    _agregar_opciones_config(p_bench)
+    p_bench.add_argument("--salida", help="archivo JSON donde guardar los resultados")
+    p_bench.add_argument("--comparar", help="JSON de una ejecución anterior para comparar casos/s")
+    p_bench.set_defaults(funcion=_comando_bench, semilla=0)
+    
+    args = parser.parse_args(argv)
+    if args.funcion in (_comando_generar, _comando_ejecutar) and args.dist_valida + args.dist_invalida > 100:
+        parser.error("--dist-valida + --dist-invalida no puede superar 100")
+    return args.funcion(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
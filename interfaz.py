@@ -1,17 +1,29 @@
 import tkinter as tk
 from tkinter import ttk, filedialog, scrolledtext
 import os
+import queue
+import threading
+import time
 from generador import GeneradorCasosPrueba
+from almacen import AlmacenCasos
 
 class InterfazGenerador:
     """Interfaz gráfica para el generador de casos de prueba."""
     
+    # Casos por mensaje de progreso y máximo de casos mostrados en resultados
+    TAM_LOTE = 500
+    MAX_VISTA_PREVIA = 200
+    INTERVALO_COLA_MS = 50
+    
     def __init__(self, root):
         self.root = root
         self.root.title("Generador Automático de Casos de Prueba")
         self.root.geometry("900x700")
         self.generador = GeneradorCasosPrueba()
         self.archivo_gramatica = None
+        self.cola = queue.Queue()
+        self.cancelar = threading.Event()
+        self.hilo = None
         self.crear_interfaz()
     
     def crear_interfaz(self):
@@ -28,10 +40,8 @@ class InterfazGenerador:
         # Sección 2: Configuración
         self._crear_seccion_configuracion(main_frame)
         
-        # Botón Generar
-        ttk.Button(main_frame, text="3. GENERAR CASOS", command=self.generar,
-                   style='Accent.TButton').grid(row=3, column=0, columnspan=3, 
-                                                 pady=15, ipadx=20, ipady=10)
+        # Botones Generar/Cancelar y progreso
+        self._crear_seccion_generacion(main_frame)
         
         # Área de resultados
         self._crear_seccion_resultados(main_frame)
@@ -49,8 +59,9 @@ class InterfazGenerador:
         frame = ttk.LabelFrame(parent, text="1. Cargar Gramática", padding="10")
         frame.grid(row=1, column=0, columnspan=3, sticky=(tk.W, tk.E), pady=5)
         
-        ttk.Button(frame, text="Seleccionar archivo .txt", 
-                  command=self.cargar_gramatica).grid(row=0, column=0, padx=5)
+        self.boton_cargar = ttk.Button(frame, text="Seleccionar archivo .txt", 
+                                       command=self.cargar_gramatica)
+        self.boton_cargar.grid(row=0, column=0, padx=5)
         
         self.label_archivo = ttk.Label(frame, text="Ningún archivo cargado", foreground="red")
         self.label_archivo.grid(row=0, column=1, padx=5)
@@ -61,23 +72,41 @@ class InterfazGenerador:
         
         # Configuraciones con valores por defecto
         configs = [
-            ("Cantidad de casos:", "spin_cantidad", 1, 1000, 20),
+            ("Cantidad de casos:", "spin_cantidad", 1, 10000000, 20),
             ("Profundidad máxima:", "spin_profundidad", 1, 30, 5),
             ("Longitud máxima (tokens):", "spin_longitud", 5, 200, 50),
             ("% Casos válidos:", "spin_validos", 0, 100, 50),
             ("% Casos inválidos:", "spin_invalidos", 0, 100, 30)
         ]
         
+        self.spins = []
         for i, (label, attr, from_, to, default) in enumerate(configs):
             ttk.Label(frame, text=label).grid(row=i, column=0, sticky=tk.W, pady=2)
             spin = ttk.Spinbox(frame, from_=from_, to=to, width=10)
             spin.set(default)
             spin.grid(row=i, column=1, padx=5, pady=2)
             setattr(self, attr, spin)
+            self.spins.append(spin)
         
         ttk.Label(frame, text="(Resto = casos extremos)", 
                  font=('Arial', 8, 'italic')).grid(row=5, column=1, sticky=tk.W)
     
+    def _crear_seccion_generacion(self, parent):
+        frame = ttk.Frame(parent)
+        frame.grid(row=3, column=0, columnspan=3, pady=10)
+        
+        self.boton_generar = ttk.Button(frame, text="3. GENERAR CASOS", command=self.generar,
+                                        style='Accent.TButton')
+        self.boton_generar.grid(row=0, column=0, padx=5, ipadx=20, ipady=10)
+        self.boton_cancelar = ttk.Button(frame, text="Cancelar", command=self.cancelar_generacion,
+                                         state=tk.DISABLED)
+        self.boton_cancelar.grid(row=0, column=1, padx=5, ipady=10)
+        
+        self.barra_progreso = ttk.Progressbar(frame, length=400, mode="determinate")
+        self.barra_progreso.grid(row=1, column=0, columnspan=2, pady=(10, 0))
+        self.label_progreso = ttk.Label(frame, text="")
+        self.label_progreso.grid(row=2, column=0, columnspan=2)
+    
     def _crear_seccion_resultados(self, parent):
         frame = ttk.LabelFrame(parent, text="4. Resultados", padding="10")
         frame.grid(row=4, column=0, columnspan=3, sticky=(tk.W, tk.E, tk.N, tk.S), pady=5)
@@ -100,6 +129,9 @@ class InterfazGenerador:
                   command=self.exportar_reporte).grid(row=0, column=1, padx=5)
     
     def cargar_gramatica(self):
+        # Cambiar de gramática reemplazaría las tablas que usa el hilo de generación
+        if self.hilo and self.hilo.is_alive():
+            return
         archivo = filedialog.askopenfilename(
             title="Seleccionar gramática",
             filetypes=[("Archivos de texto", "*.txt"), ("Todos", "*.*")]
@@ -107,6 +139,11 @@ class InterfazGenerador:
         if archivo and self.generador.cargar_gramatica(archivo):
             self.archivo_gramatica = archivo
             self.label_archivo.config(text=f"✓ {os.path.basename(archivo)}", foreground="green")
+            advertencias = self.generador.advertencias_gramatica()
+            if advertencias:
+                self.texto_resultados.delete(1.0, tk.END)
+                for advertencia in advertencias:
+                    self.texto_resultados.insert(tk.END, f"⚠️ {advertencia}\n", "warning")
         elif archivo:
             self.label_archivo.config(text="✗ Error al cargar gramática", foreground="red")
     
@@ -115,6 +152,8 @@ class InterfazGenerador:
             self.texto_resultados.delete(1.0, tk.END)
             self.texto_resultados.insert(tk.END, "❌ ERROR: Primero debes cargar una gramática\n", "error")
             return
+        if self.hilo and self.hilo.is_alive():
+            return
         
         try:
             cantidad = int(self.spin_cantidad.get())
@@ -128,26 +167,103 @@ class InterfazGenerador:
                 self.texto_resultados.insert(tk.END, "❌ ERROR: Válidos + Inválidos no puede superar 100%\n", "error")
                 return
             
-            self.texto_resultados.delete(1.0, tk.END)
-            self.texto_resultados.insert(tk.END, "⏳ Generando casos...\n")
-            self.root.update()
-            
-            # Configurar y generar
-            self.generador.configurar(profundidad, longitud, dist_valida, dist_invalida)
-            self.generador.generar_casos(cantidad)
-            
-            self._mostrar_reporte()
-            
         except ValueError as e:
             self.texto_resultados.delete(1.0, tk.END)
             self.texto_resultados.insert(tk.END, f"❌ ERROR: Valores inválidos - {e}\n", "error")
+            return
+        
+        self.texto_resultados.delete(1.0, tk.END)
+        self.texto_resultados.insert(tk.END, "⏳ Generando casos...\n")
+        self.barra_progreso.config(maximum=cantidad, value=0)
+        self.label_progreso.config(text="")
+        self._habilitar_controles(False)
+        
+        # Configurar y generar en segundo plano
+        self.generador.configurar(profundidad, longitud, dist_valida, dist_invalida)
+        self.generador.resultados = AlmacenCasos()
+        self.cancelar.clear()
+        self.hilo = threading.Thread(target=self._trabajo_generacion, args=(cantidad, ), daemon=True)
+        self.hilo.start()
+        self.root.after(self.INTERVALO_COLA_MS, self._procesar_cola)
+    
+    def _habilitar_controles(self, habilitar):
+        """Habilita los controles de carga y configuración (y deshabilita Cancelar) o al revés."""
+        estado = tk.NORMAL if habilitar else tk.DISABLED
+        for control in [self.boton_generar, self.boton_cargar] + self.spins:
+            control.config(state=estado)
+        self.boton_cancelar.config(state=tk.DISABLED if habilitar else tk.NORMAL)
+    
+    def cancelar_generacion(self):
+        self.cancelar.set()
+        self.boton_cancelar.config(state=tk.DISABLED)
     
-    def _mostrar_reporte(self):
+    def _trabajo_generacion(self, cantidad):
+        """Genera en un hilo aparte y envía el progreso por lotes a la cola."""
+        resultados = self.generador.resultados
+        casos = self.generador.iter_registros(cantidad)
+        inicio = time.perf_counter()
+        vista_previa = []
+        error = None
+        try:
+            for registro in casos:
+                resultados.agregar(*registro)
+                if len(resultados) <= self.MAX_VISTA_PREVIA:
+                    id_caso, tipo, tokens = registro[:3]
+                    vista_previa.append(f"{id_caso:>6} [{tipo}] {' '.join(tokens)}\n")
+                
+                if len(resultados) % self.TAM_LOTE == 0 or len(resultados) == cantidad:
+                    velocidad = len(resultados) / max(time.perf_counter() - inicio, 1e-9)
+                    self.cola.put(("progreso", len(resultados), velocidad, "".join(vista_previa)))
+                    vista_previa = []
+                if self.cancelar.is_set():
+                    break
+        except Exception as e:
+            error = str(e)
+            self.cola.put(("error", error))
+        finally:
+            casos.close()
+        self.cola.put(("fin", self.cancelar.is_set(), len(resultados), error))
+    
+    def _procesar_cola(self):
+        """Atiende los mensajes del hilo de generación desde el hilo de Tk."""
+        try:
+            while True:
+                mensaje = self.cola.get_nowait()
+                if mensaje[0] == "progreso":
+                    _, hechos, velocidad, texto = mensaje
+                    self.barra_progreso.config(value=hechos)
+                    self.label_progreso.config(
+                        text=f"{hechos}/{int(self.barra_progreso['maximum'])} casos · {velocidad:,.0f} casos/s")
+                    if texto:
+                        self.texto_resultados.insert(tk.END, texto)
+                        self.texto_resultados.see(tk.END)
+                elif mensaje[0] == "error":
+                    self.texto_resultados.insert(tk.END, f"❌ ERROR: {mensaje[1]}\n", "error")
+                else:
+                    _, cancelado, hechos, error = mensaje
+                    self._habilitar_controles(True)
+                    if hechos:
+                        self._mostrar_reporte(cancelado, error)
+                    return
+        except queue.Empty:
+            pass
+        self.root.after(self.INTERVALO_COLA_MS, self._procesar_cola)
+    
+    def _mostrar_reporte(self, cancelado=False, error=None):
         reporte = self.generador.generar_reporte()
         self.texto_resultados.delete(1.0, tk.END)
+        # Un error de la generación se mantiene visible sobre el reporte parcial
+        if error is not None:
+            self.texto_resultados.insert(tk.END, f"❌ ERROR: {error}\n\n", "error")
         
+        if error is not None:
+            estado = 'GENERACIÓN INTERRUMPIDA POR ERROR (resultados parciales)'
+        elif cancelado:
+            estado = 'GENERACIÓN CANCELADA (resultados parciales)'
+        else:
+            estado = 'GENERACIÓN COMPLETADA'
         texto = f"""{'='*70}
-GENERACIÓN COMPLETADA
+{estado}
 {'='*70}
 
 Total: {reporte['total_casos']} casos
@@ -180,6 +296,8 @@ OPERADORES:
         self.texto_resultados.insert(tk.END, texto)
     
     def exportar_json(self):
+        if self.hilo and self.hilo.is_alive():
+            return
         if not self.generador.resultados:
             self.texto_resultados.delete(1.0, tk.END)
             self.texto_resultados.insert(tk.END, "⚠️ No hay casos para exportar\n", "warning")
@@ -194,6 +312,8 @@ OPERADORES:
             self.texto_resultados.insert(tk.END, f"\n✓ JSON exportado: {os.path.basename(archivo)}\n", "success")
     
     def exportar_reporte(self):
+        if self.hilo and self.hilo.is_alive():
+            return
         if not self.generador.resultados:
             self.texto_resultados.delete(1.0, tk.END)
             self.texto_resultados.insert(tk.END, "⚠️ No hay reporte para exportar\n", "warning")
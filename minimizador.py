@@ -0,0 +1,204 @@
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+from ejecutor import Ejecutor
+
+
+def oraculo_discrepancia(generador, objetivo, timeout=60.0):
+    """Oráculo "sigue fallando": el objetivo y la gramática discrepan sobre la cadena.
+
+    `objetivo` es un comando (lista de argumentos, mismo protocolo que Ejecutor)
+    o una función cadena -> bool. Un error o tiempo límite del objetivo también
+    cuenta como fallo.
+    """
+    reconocer = generador.reconocedor().reconocer
+    interpretar = Ejecutor(objetivo).interpretar
+
+    def veredicto_objetivo(cadena):
+        if callable(objetivo):
+            try:
+                return bool(objetivo(cadena))
+            except Exception:
+                return None
+        try:
+            proceso = subprocess.run(objetivo, input=cadena + "\n", capture_output=True,
+                                     text=True, timeout=timeout)
+            return interpretar(proceso.stdout) if proceso.returncode == 0 else None
+        except (OSError, subprocess.TimeoutExpired, ValueError):
+            return None
+
+    def oraculo(cadena):
+        return veredicto_objetivo(cadena) != reconocer(cadena.split())[0]
+    return oraculo
+
+
+class Minimizador:
+    """Reduce un caso que falla a un reproductor mínimo.
+
+    Si la cadena pertenece a la gramática (y el reconocedor es SLR) se aplica
+    delta debugging jerárquico sobre su árbol de derivación: primero se
+    reemplazan subárboles por descendientes del mismo símbolo y luego, nivel
+    por nivel, ddmin decide qué subárboles pueden reemplazarse por la cadena
+    más corta de su no terminal, así que los candidatos siguen siendo
+    sintácticamente válidos y se descartan subárboles completos de una vez.
+    Después (o directamente, si la cadena no se puede analizar) ddmin sobre
+    tokens deja un resultado 1-mínimo.
+
+    El oráculo (cadena -> True si sigue fallando) se memoiza por cadena y los
+    candidatos de cada ronda se evalúan de a `workers` en paralelo.
+    """
+
+    def __init__(self, generador, oraculo, workers=4):
+        self.generador = generador
+        self.oraculo = oraculo
+        self.workers = workers
+        self.cache = {}
+        self.ejecuciones = 0
+        self.consultas = 0
+
+    def _primero_que_falla(self, candidatos, pool):
+        """Índice del primer candidato (lista de tokens) que sigue fallando, o None."""
+        for inicio in range(0, len(candidatos), self.workers):
+            trozo = [" ".join(c) for c in candidatos[inicio:inicio + self.workers]]
+            self.consultas += len(trozo)
+            pendientes = list(dict.fromkeys(c for c in trozo if c not in self.cache))
+            self.ejecuciones += len(pendientes)
+            for cadena, falla in zip(pendientes, pool.map(self.oraculo, pendientes)):
+                self.cache[cadena] = falla
+            for j, cadena in enumerate(trozo):
+                if self.cache[cadena]:
+                    return inicio + j
+        return None
+
+    def _ddmin(self, elementos, construir, pool):
+        """ddmin clásico: subconjunto 1-mínimo de `elementos` que sigue fallando.
+
+        construir(subconjunto) arma la lista de tokens que conserva sólo esos elementos.
+        """
+        if elementos and self._primero_que_falla([construir([])], pool) is not None:
+            return []
+        n = 2
+        while len(elementos) >= 2:
+            tam = len(elementos) / n
+            trozos = [elementos[int(i * tam):int((i + 1) * tam)] for i in range(n)]
+            complementos = [elementos[:int(i * tam)] + elementos[int((i + 1) * tam):] for i in range(n)]
+            subconjuntos = trozos + (complementos if n > 2 else [])
+            i = self._primero_que_falla([construir(s) for s in subconjuntos], pool)
+            if i is not None:
+                elementos = subconjuntos[i]
+                n = 2 if i < n else max(n - 1, 2)
+            elif n >= len(elementos):
+                break
+            else:
+                n = min(2 * n, len(elementos))
+        return elementos
+
+    def _rendir(self, raiz, reemplazados, minimas):
+        """IDs de terminales del árbol, con los nodos `reemplazados` cambiados por su cadena mínima."""
+        ids, pila = [], [raiz]
+        while pila:
+            nodo = pila.pop()
+            simbolo, hijos = nodo
+            if id(nodo) in reemplazados:
+                ids.extend(minimas[simbolo])
+            elif hijos is None:
+                ids.append(simbolo)
+            else:
+                pila.extend(reversed(hijos))
+        return ids
+
+    def _elevar(self, raiz, pool):
+        """Reemplaza subárboles por descendientes del mismo no terminal mientras siga fallando.
+
+        Es el paso que HDD no puede dar solo: p. ej. reducir "E + T" a la E
+        interior. Recorre el árbol de arriba hacia abajo y modifica los nodos en el lugar.
+        """
+        simbolos = self.generador.simbolos
+
+        def cadena():
+            return [simbolos[i] for i in self._rendir(raiz, (), None)]
+
+        pendientes = [raiz]
+        while pendientes:
+            nodo = pendientes.pop()
+            if nodo[1] is None:
+                continue
+            # Descendientes más cercanos con el mismo símbolo que el nodo
+            iguales, pila = [], list(nodo[1])
+            while pila:
+                d = pila.pop()
+                if d[0] == nodo[0]:
+                    iguales.append(d)
+                elif d[1] is not None:
+                    pila.extend(d[1])
+            original = nodo[:]
+            candidatos = []
+            for d in iguales:
+                nodo[:] = d
+                candidatos.append(cadena())
+            nodo[:] = original
+            i = self._primero_que_falla(candidatos, pool)
+            if i is not None:
+                nodo[:] = iguales[i]
+                pendientes.append(nodo)
+            else:
+                pendientes.extend(nodo[1])
+
+    def _hdd(self, raiz, pool):
+        """Delta debugging jerárquico; retorna los tokens resultantes."""
+        minimas = self.generador.constructor_extremos().minimas
+        simbolos = self.generador.simbolos
+        reemplazados = set()
+
+        def construir(conservar, candidatos):
+            quitar = reemplazados | ({id(n) for n in candidatos} - {id(n) for n in conservar})
+            return [simbolos[i] for i in self._rendir(raiz, quitar, minimas)]
+
+        nivel = [raiz]
+        while nivel:
+            candidatos = [
+                n for n in nivel
+                if n[1] is not None and self._rendir(n, reemplazados, minimas) != list(minimas[n[0]])
+            ]
+            if candidatos:
+                conservar = self._ddmin(candidatos, lambda sub: construir(sub, candidatos), pool)
+                conservados = {id(n) for n in conservar}
+                reemplazados |= {id(n) for n in candidatos if id(n) not in conservados}
+            nivel = [h for n in nivel if id(n) not in reemplazados and n[1] for h in n[1]]
+        return [simbolos[i] for i in self._rendir(raiz, reemplazados, minimas)]
+
+    def minimizar(self, cadena):
+        """Minimiza una cadena que falla. Retorna un dict con el resultado y el costo."""
+        tokens = cadena.split()
+        ejecuciones, consultas = self.ejecuciones, self.consultas
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            if self._primero_que_falla([tokens], pool) is None:
+                raise ValueError("El caso original no falla según el oráculo")
+            raiz = self.generador.reconocedor().arbol(tokens)
+            metodo = "ddmin"
+            if raiz is not None:
+                self._elevar(raiz, pool)
+                tokens = self._hdd(raiz, pool)
+                metodo = "hdd+ddmin"
+            posiciones = self._ddmin(list(range(len(tokens))), lambda sub: [tokens[i] for i in sub], pool)
+            tokens = [tokens[i] for i in posiciones]
+
+        consultas = self.consultas - consultas
+        return {
+            "original": cadena,
+            "minimizada": " ".join(tokens),
+            "tokens_original": len(cadena.split()),
+            "tokens_minimizados": len(tokens),
+            "metodo": metodo,
+            "ejecuciones_oraculo": self.ejecuciones - ejecuciones,
+            "consultas": consultas,
+            "aciertos_cache": consultas - (self.ejecuciones - ejecuciones)
+        }
+
+    def minimizar_casos(self, casos):
+        """Minimiza varios casos (dicts con "cadena", p. ej. de resultados o de un NDJSON de discrepancias).
+
+        La caché del oráculo se comparte entre casos. Retorna un dict por caso,
+        con su "id" si lo tiene.
+        """
+        return [dict(self.minimizar(caso["cadena"]), id=caso.get("id")) for caso in casos]
@@ -0,0 +1,36 @@
+"""Objetivo de prueba local para el ejecutor: reconoce las cadenas con la gramática.
+
+Lee una cadena por línea en stdin y escribe 1 (acepta) o 0 (rechaza) por línea.
+Con --invertir-cada N invierte una de cada N respuestas, para simular un
+compilador con errores y ver discrepancias sin depender de un objetivo real.
+"""
+import argparse
+import sys
+
+from generador import GeneradorCasosPrueba
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Objetivo de prueba: reconocedor de la gramática")
+    parser.add_argument("gramatica", help="archivo de gramática")
+    parser.add_argument("--invertir-cada", type=int, default=0, help="invierte una de cada N respuestas")
+    args = parser.parse_args(argv)
+
+    generador = GeneradorCasosPrueba()
+    if not generador.cargar_gramatica(args.gramatica):
+        print(f"Error: no se pudo cargar la gramática {args.gramatica}", file=sys.stderr)
+        return 1
+    reconocer = generador.reconocedor().reconocer
+
+    respuestas = []
+    for n, linea in enumerate(sys.stdin, 1):
+        aceptada = reconocer(linea.split())[0]
+        if args.invertir_cada and n % args.invertir_cada == 0:
+            aceptada = not aceptada
+        respuestas.append("1\n" if aceptada else "0\n")
+    sys.stdout.write("".join(respuestas))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
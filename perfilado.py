@@ -0,0 +1,84 @@
+import cProfile
+import pstats
+import sys
+import threading
+from collections import Counter
+
+
+class PerfilEjecucion:
+    """Perfilado opcional de una ejecución: cProfile o muestreo periódico de la pila.
+
+    modo="cprofile" registra todas las llamadas (preciso, pero agrega sobrecosto);
+    modo="muestreo" inspecciona cada `intervalo` segundos la función que está
+    ejecutando el hilo perfilado, con un costo casi nulo para la generación.
+    """
+
+    MODOS = ("cprofile", "muestreo")
+
+    def __init__(self, modo="cprofile", intervalo=0.001):
+        if modo not in self.MODOS:
+            raise ValueError(f"Modo de perfil desconocido: {modo}")
+        self.modo = modo
+        self.intervalo = intervalo
+        self.perfil = None
+        self.muestras = Counter()
+        self._detener = threading.Event()
+        self._hilo = None
+
+    def iniciar(self):
+        """Empieza a perfilar el hilo que llama."""
+        if self.modo == "cprofile":
+            self.perfil = cProfile.Profile()
+            self.perfil.enable()
+            return
+        objetivo = threading.get_ident()
+        self._detener.clear()
+        self._hilo = threading.Thread(target=self._muestrear, args=(objetivo, ), daemon=True)
+        self._hilo.start()
+
+    def _muestrear(self, objetivo):
+        while not self._detener.wait(self.intervalo):
+            marco = sys._current_frames().get(objetivo)
+            if marco is not None:
+                codigo = marco.f_code
+                self.muestras[f"{codigo.co_filename}:{codigo.co_firstlineno}({codigo.co_name})"] += 1
+
+    def detener(self):
+        if self.modo == "cprofile":
+            self.perfil.disable()
+        else:
+            self._detener.set()
+            self._hilo.join()
+
+    def guardar(self, nombre_archivo):
+        """Guarda las estadísticas de cProfile (legibles con pstats o snakeviz)."""
+        if self.perfil is not None:
+            self.perfil.dump_stats(nombre_archivo)
+
+    def resumen(self, filas=15):
+        """Las funciones más costosas como dict listo para el reporte."""
+        if self.modo == "muestreo":
+            total = sum(self.muestras.values())
+            return {
+                "modo": self.modo,
+                "muestras": total,
+                "funciones": [
+                    {"funcion": funcion, "muestras": n, "porcentaje": round(100 * n / total, 2)}
+                    for funcion, n in self.muestras.most_common(filas)
+                ]
+            }
+
+        estadisticas = pstats.Stats(self.perfil).stats
+        orden = sorted(estadisticas.items(), key=lambda item: item[1][2], reverse=True)[:filas]
+        return {
+            "modo": self.modo,
+            "funciones": [
+                {
+                    "funcion": f"{archivo}:{linea}({nombre})",
+                    "llamadas": llamadas,
+                    "tiempo_propio_segundos": round(propio, 6),
+                    "tiempo_acumulado_segundos": round(acumulado, 6)
+                }
+                for (archivo, linea, nombre), (_, llamadas, propio, acumulado, _) in orden
+            ]
+        }
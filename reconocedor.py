@@ -0,0 +1,261 @@
+class Reconocedor:
+    """Reconocedor construido automáticamente desde la gramática compilada.
+
+    Intenta construir tablas SLR(1) (acción/ir_a) y reconoce cada cadena en
+    tiempo lineal. Si la gramática tiene conflictos SLR recurre a un
+    reconocedor de Earley, que acepta cualquier gramática libre de contexto.
+    """
+
+    FIN = -1
+
+    def __init__(self, generador, simbolo_inicial):
+        self.num_no_terminales = nt = generador.num_no_terminales
+        if not 0 <= simbolo_inicial < nt:
+            raise ValueError("El símbolo inicial no es un no terminal de la gramática")
+        self.ids_terminal = {
+            nombre: i for nombre, i in generador.ids_simbolo.items() if i >= nt
+        }
+        self.producciones = [
+            tuple(generador.prod_simbolos[generador.prod_inicio[p]:generador.prod_inicio[p + 1]])
+            for p in range(len(generador.prod_lhs))
+        ]
+        self.prod_lhs = list(generador.prod_lhs)
+
+        # Producción aumentada S' -> S, con lado izquierdo ficticio -1
+        self.aumentada = len(self.producciones)
+        self.producciones.append((simbolo_inicial, ))
+        self.prod_lhs.append(-1)
+        self.producciones_de = [[] for _ in range(nt)]
+        for p, lhs in enumerate(self.prod_lhs[:-1]):
+            self.producciones_de[lhs].append(p)
+
+        self._calcular_primeros_siguientes()
+        self.modo = "slr" if self._construir_tablas_slr() else "earley"
+
+    def _calcular_primeros_siguientes(self):
+        """Calcula anulables, PRIMEROS y SIGUIENTES de cada no terminal."""
+        nt = self.num_no_terminales
+        self.anulable = [False] * nt
+        self.primeros = [set() for _ in range(nt)]
+        self.siguientes = [set() for _ in range(nt)]
+        self.siguientes[self.producciones[self.aumentada][0]].add(self.FIN)
+
+        cambio = True
+        while cambio:
+            cambio = False
+            for p, rhs in enumerate(self.producciones[:-1]):
+                lhs = self.prod_lhs[p]
+                antes = len(self.primeros[lhs])
+                self.primeros[lhs] |= self._primeros_secuencia(rhs)
+                if all(x < nt and self.anulable[x] for x in rhs) and not self.anulable[lhs]:
+                    self.anulable[lhs] = cambio = True
+                cambio |= len(self.primeros[lhs]) != antes
+
+        cambio = True
+        while cambio:
+            cambio = False
+            for p, rhs in enumerate(self.producciones):
+                lhs = self.prod_lhs[p]
+                for i, x in enumerate(rhs):
+                    if x >= nt:
+                        continue
+                    resto = rhs[i + 1:]
+                    nuevos = self._primeros_secuencia(resto)
+                    if lhs >= 0 and all(y < nt and self.anulable[y] for y in resto):
+                        nuevos = nuevos | self.siguientes[lhs]
+                    if not nuevos <= self.siguientes[x]:
+                        self.siguientes[x] |= nuevos
+                        cambio = True
+
+    def _primeros_secuencia(self, secuencia):
+        """PRIMEROS de una secuencia de símbolos."""
+        resultado = set()
+        for x in secuencia:
+            if x >= self.num_no_terminales:
+                resultado.add(x)
+                return resultado
+            resultado |= self.primeros[x]
+            if not self.anulable[x]:
+                return resultado
+        return resultado
+
+    def _clausura(self, items):
+        """Clausura LR(0) de un conjunto de ítems (producción, punto)."""
+        clausura, pendientes = set(items), list(items)
+        while pendientes:
+            p, punto = pendientes.pop()
+            rhs = self.producciones[p]
+            if punto < len(rhs) and rhs[punto] < self.num_no_terminales:
+                for q in self.producciones_de[rhs[punto]]:
+                    if (q, 0) not in clausura:
+                        clausura.add((q, 0))
+                        pendientes.append((q, 0))
+        return frozenset(clausura)
+
+    def _construir_tablas_slr(self):
+        """Construye las tablas SLR(1). Retorna False si hay conflictos."""
+        estados = [self._clausura([(self.aumentada, 0)])]
+        indice = {estados[0]: 0}
+        self.acciones, self.ir_a = [], []
+
+        i = 0
+        while i < len(estados):
+            acciones, ir_a, transiciones = {}, {}, {}
+            for p, punto in estados[i]:
+                rhs = self.producciones[p]
+                if punto < len(rhs):
+                    transiciones.setdefault(rhs[punto], []).append((p, punto + 1))
+                elif p == self.aumentada:
+                    if acciones.get(self.FIN, -(p + 1)) != -(p + 1):
+                        return False
+                    acciones[self.FIN] = -(p + 1)
+                else:
+                    for a in self.siguientes[self.prod_lhs[p]]:
+                        if acciones.get(a, -(p + 1)) != -(p + 1):
+                            return False
+                        acciones[a] = -(p + 1)
+
+            for x, kernel in transiciones.items():
+                destino = self._clausura(kernel)
+                if destino not in indice:
+                    indice[destino] = len(estados)
+                    estados.append(destino)
+                if x < self.num_no_terminales:
+                    ir_a[x] = indice[destino]
+                elif x in acciones:
+                    return False
+                else:
+                    acciones[x] = indice[destino]
+            self.acciones.append(acciones)
+            self.ir_a.append(ir_a)
+            i += 1
+        self.longitudes = [len(rhs) for rhs in self.producciones]
+        return True
+
+    def _reconocer_slr(self, ids):
+        """Reconoce una secuencia de IDs con las tablas SLR."""
+        acciones, ir_a = self.acciones, self.ir_a
+        longitudes, prod_lhs, aceptar = self.longitudes, self.prod_lhs, -(self.aumentada + 1)
+        n = len(ids)
+        pila, i = [0], 0
+        a = ids[0] if n else self.FIN
+        while True:
+            accion = acciones[pila[-1]].get(a)
+            if accion is None:
+                return False, i
+            if accion >= 0:
+                pila.append(accion)
+                i += 1
+                a = ids[i] if i < n else self.FIN
+            elif accion == aceptar:
+                return True, None
+            else:
+                p = -accion - 1
+                if longitudes[p]:
+                    del pila[-longitudes[p]:]
+                pila.append(ir_a[pila[-1]][prod_lhs[p]])
+
+    def arbol(self, tokens):
+        """Árbol de derivación de una cadena aceptada, usando las tablas SLR.
+
+        Cada nodo es una lista [simbolo, hijos]; las hojas (terminales) tienen
+        hijos None. Retorna None si la cadena no pertenece al lenguaje o si el
+        reconocedor está en modo Earley.
+        """
+        if self.modo != "slr":
+            return None
+        ids = [self.ids_terminal.get(t) for t in tokens]
+        if None in ids:
+            return None
+        acciones, ir_a = self.acciones, self.ir_a
+        aceptar = -(self.aumentada + 1)
+        n = len(ids)
+        pila, nodos, i = [0], [], 0
+        a = ids[0] if n else self.FIN
+        while True:
+            accion = acciones[pila[-1]].get(a)
+            if accion is None:
+                return None
+            if accion >= 0:
+                pila.append(accion)
+                nodos.append([a, None])
+                i += 1
+                a = ids[i] if i < n else self.FIN
+            elif accion == aceptar:
+                return nodos[-1]
+            else:
+                p = -accion - 1
+                largo = self.longitudes[p]
+                hijos = nodos[len(nodos) - largo:]
+                if largo:
+                    del pila[-largo:]
+                    del nodos[-largo:]
+                nodos.append([self.prod_lhs[p], hijos])
+                pila.append(ir_a[pila[-1]][self.prod_lhs[p]])
+
+    def _reconocer_earley(self, ids):
+        """Reconoce una secuencia de IDs con el algoritmo de Earley."""
+        nt, producciones, prod_lhs = self.num_no_terminales, self.producciones, self.prod_lhs
+        n = len(ids)
+        conjuntos = [[] for _ in range(n + 1)]
+        vistos = [set() for _ in range(n + 1)]
+
+        def agregar(item, k):
+            if item not in vistos[k]:
+                vistos[k].add(item)
+                conjuntos[k].append(item)
+
+        agregar((self.aumentada, 0, 0), 0)
+        for k in range(n + 1):
+            cola, j = conjuntos[k], 0
+            while j < len(cola):
+                p, punto, origen = cola[j]
+                j += 1
+                rhs = producciones[p]
+                if punto < len(rhs):
+                    x = rhs[punto]
+                    if x < nt:
+                        for q in self.producciones_de[x]:
+                            agregar((q, 0, k), k)
+                        if self.anulable[x]:
+                            agregar((p, punto + 1, origen), k)
+                    elif k < n and ids[k] == x:
+                        agregar((p, punto + 1, origen), k + 1)
+                else:
+                    lhs = prod_lhs[p]
+                    for q, d, o in list(conjuntos[origen]):
+                        if d < len(producciones[q]) and producciones[q][d] == lhs:
+                            agregar((q, d + 1, o), k)
+            if k < n and not conjuntos[k + 1]:
+                return False, k
+        if (self.aumentada, 1, 0) in vistos[n]:
+            return True, None
+        return False, n
+
+    def reconocer(self, tokens):
+        """Reconoce una lista de tokens. Retorna (aceptada, posicion_error).
+
+        posicion_error es el índice del primer token que no puede continuar un
+        prefijo válido (len(tokens) si la cadena termina antes de tiempo) o
+        None si la cadena es aceptada.
+        """
+        ids_terminal = self.ids_terminal
+        ids = []
+        for i, t in enumerate(tokens):
+            id_t = ids_terminal.get(t)
+            if id_t is None:
+                # Token desconocido: basta reconocer el prefijo para ubicar el error
+                aceptada, pos = self.reconocer(tokens[:i])
+                return False, (i if aceptada else pos)
+            ids.append(id_t)
+        if self.modo == "slr":
+            return self._reconocer_slr(ids)
+        return self._reconocer_earley(ids)
+
+    def verificar(self, cadenas):
+        """Verifica un lote de cadenas (str o listas de tokens).
+
+        Retorna una lista de tuplas (aceptada, posicion_error) en el mismo orden.
+        """
+        reconocer = self.reconocer
+        return [reconocer(c.split() if isinstance(c, str) else c) for c in cadenas]
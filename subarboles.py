@@ -0,0 +1,110 @@
+import sys
+import threading
+from array import array
+from collections import OrderedDict
+
+
+class PoolSubarboles:
+    """Pool acotado de subárboles ya derivados, con desalojo LRU.
+
+    Las claves son (no_terminal, profundidad_restante) y cada una guarda hasta
+    FRAGMENTOS_POR_CLAVE secuencias de IDs de terminales. Un fragmento derivado
+    desde A con cierta profundidad restante puede reemplazar cualquier otra
+    expansión de A con la misma profundidad restante, así que la cadena
+    ensamblada sigue perteneciendo a la gramática. Varios hilos pueden
+    compartir un pool: cada operación se hace bajo un cerrojo.
+    """
+
+    FRAGMENTOS_POR_CLAVE = 8
+    # Subárboles con menos profundidad restante se derivan directamente
+    RESTANTE_MINIMO = 3
+
+    def __init__(self, capacidad_tokens):
+        self.capacidad_tokens = capacidad_tokens
+        self.fragmentos = OrderedDict()
+        self.tokens = 0
+        self.bytes = 0
+        self.aciertos = 0
+        self.fallos = 0
+        self.desalojos = 0
+        self._cerrojo = threading.Lock()
+
+    def __getstate__(self):
+        estado = self.__dict__.copy()
+        del estado["_cerrojo"]
+        return estado
+
+    def __setstate__(self, estado):
+        self.__dict__.update(estado)
+        self._cerrojo = threading.Lock()
+
+    def obtener(self, clave, rng):
+        """Retorna un fragmento guardado para `clave` o None.
+
+        Mientras la clave no tenga FRAGMENTOS_POR_CLAVE fragmentos se cuenta
+        como fallo, para que el pool se llene con variedad antes de reutilizar.
+        """
+        with self._cerrojo:
+            lista = self.fragmentos.get(clave)
+            if lista is None or len(lista) < self.FRAGMENTOS_POR_CLAVE:
+                self.fallos += 1
+                return None
+            self.fragmentos.move_to_end(clave)
+            self.aciertos += 1
+            return rng.choice(lista)
+
+    def guardar(self, clave, ids, rng):
+        """Guarda un fragmento; si la clave está llena reemplaza uno al azar."""
+        fragmento = array('i', ids)
+        if len(fragmento) > self.capacidad_tokens:
+            return
+        with self._cerrojo:
+            lista = self.fragmentos.get(clave)
+            if lista is None:
+                lista = self.fragmentos[clave] = []
+            else:
+                self.fragmentos.move_to_end(clave)
+
+            if len(lista) < self.FRAGMENTOS_POR_CLAVE:
+                lista.append(fragmento)
+            else:
+                i = rng.randrange(len(lista))
+                self._descontar(lista[i])
+                lista[i] = fragmento
+            self.tokens += len(fragmento)
+            self.bytes += sys.getsizeof(fragmento)
+
+            # Desalojo LRU de claves completas hasta respetar la capacidad
+            while self.tokens > self.capacidad_tokens:
+                _, viejos = self.fragmentos.popitem(last=False)
+                for f in viejos:
+                    self._descontar(f)
+                self.desalojos += 1
+
+    def _descontar(self, fragmento):
+        self.tokens -= len(fragmento)
+        self.bytes -= sys.getsizeof(fragmento)
+
+    def reiniciar_estadisticas(self):
+        with self._cerrojo:
+            self.aciertos = self.fallos = self.desalojos = 0
+
+    def combinar_estadisticas(self, estadisticas):
+        """Suma los contadores de otro pool (p. ej. de un shard); el contenido no se copia."""
+        with self._cerrojo:
+            self.aciertos += estadisticas["aciertos"]
+            self.fallos += estadisticas["fallos"]
+            self.desalojos += estadisticas["desalojos"]
+
+    def estadisticas(self):
+        with self._cerrojo:
+            consultas = self.aciertos + self.fallos
+            return {
+                "aciertos": self.aciertos,
+                "fallos": self.fallos,
+                "tasa_aciertos": self.aciertos / consultas if consultas else 0.0,
+                "desalojos": self.desalojos,
+                "claves": len(self.fragmentos),
+                "tokens": self.tokens,
+                "memoria_bytes": self.bytes
+            }